@@ -1,10 +1,15 @@
 import os
 import re
 import json
+import asyncio
+import atexit
 import logging
-import requests
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI
+from api_client import APIClient
 from dotenv import load_dotenv
+from nlu_cache import NLUCache
+from intent_router import IntentRouter
+import response_policy
 
 # Configure Logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -13,6 +18,11 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(
 load_dotenv()
 
 class AgentLLM:
+    # Safe to retry against the API: they never change state
+    READ_ONLY_TOOLS = {"check_conflicts", "scan_conflicts", "find_matches", "suggest_reassignment",
+                       "query_pilots", "query_drones", "query_missions"}
+    UNKNOWN_REPLY = "I didn't understand that request. Try 'Assign P001 to PRJ001' or 'Check conflicts for PRJ001'."
+
     def __init__(self, api_url="http://127.0.0.1:8000", openrouter_key=None, direct_mode=False):
         self.api_url = api_url
         self.direct_mode = direct_mode
@@ -20,6 +30,33 @@ class AgentLLM:
         self.api_key = openrouter_key or os.getenv("OPENROUTER_API_KEY")
         self.client = None
         self.logic = None
+        self.base_url = os.getenv("LLM_BASE_URL", "https://openrouter.ai/api/v1")
+        self.model = os.getenv("LLM_MODEL", "openai/gpt-4o-mini")
+        # Created on first async use, inside the caller's event loop
+        self._async_client = None
+        # Keep-alive pool for API mode; only read-only tools are retried
+        self.api = APIClient(
+            api_url,
+            connect_timeout=float(os.getenv("API_CONNECT_TIMEOUT", "3")),
+            read_timeout=float(os.getenv("API_READ_TIMEOUT", "30")),
+            retries=int(os.getenv("API_RETRIES", "2")),
+            compress=os.getenv("API_COMPRESS", "").lower() in ("1", "true", "yes"),
+        )
+
+        # Repeated commands skip the NLU round trip (NLU_CACHE_FILE="" keeps the cache in memory only)
+        cache_file = os.getenv("NLU_CACHE_FILE", os.path.join(".aeroagent_cache", "nlu_cache.json"))
+        self.nlu_cache = NLUCache(
+            max_size=int(os.getenv("NLU_CACHE_SIZE", "512")),
+            ttl=float(os.getenv("NLU_CACHE_TTL", str(24 * 3600))),
+            path=cache_file or None,
+        )
+        if cache_file:
+            atexit.register(self._save_nlu_cache)
+
+        # Commands the router is at least this sure about skip the LLM entirely
+        self.router = IntentRouter(threshold=float(os.getenv("ROUTER_CONFIDENCE_THRESHOLD", "0.9")))
+        # Tool results sent to the LLM are cut down to roughly this many tokens
+        self.response_token_budget = int(os.getenv("RESPONSE_TOKEN_BUDGET", "1500"))
         
         # In Direct Mode, we bypass the API and use Logic directly
         if self.direct_mode:
@@ -31,7 +68,7 @@ class AgentLLM:
         
         if self.api_key:
             self.client = OpenAI(
-                base_url="https://openrouter.ai/api/v1",
+                base_url=self.base_url,
                 api_key=self.api_key,
             )
         else:
@@ -51,12 +88,17 @@ class AgentLLM:
         - QUERY_DRONES: { "tool": "query_drones", "filters": { "location": "...", "status": "...", "capabilities": "..." } }
         - QUERY_MISSIONS: { "tool": "query_missions", "filters": { "location": "...", "priority": "..." } }
         - CHECK_CONFLICTS: { "tool": "check_conflicts", "project_id": "PRJ...", "pilot_id": "P...", "drone_id": "D..." }
+        - SCAN_CONFLICTS: { "tool": "scan_conflicts" } (checks every current assignment)
         - FIND_MATCHES: { "tool": "find_matches", "project_id": "PRJ..." }
         - ASSIGN_PILOT: { "tool": "assign_pilot", "project_id": "PRJ...", "pilot_id": "P...", "force": bool }
         - ASSIGN_DRONE: { "tool": "assign_drone", "project_id": "PRJ...", "drone_id": "D...", "force": bool }
         - SUGGEST_REASSIGNMENT: { "tool": "suggest_reassignment", "project_id": "PRJ...", "urgent": bool }
+        - PLAN_ASSIGNMENTS: { "tool": "plan_assignments", "project_ids": ["PRJ..."], "force": bool } (staffs every open mission at once, or just project_ids; force applies the plan)
         - GENERAL_CHAT: { "tool": "general_chat", "reply": "Your response to the user..." } 
         
+        If the message contains several commands (e.g. "assign P001 to PRJ001, D003 to PRJ001"),
+        return a JSON array with one tool call per command instead.
+        
         OUTPUT FORMAT:
         Return ONLY the JSON object. Do not add markdown or explanation.
         """
@@ -68,95 +110,124 @@ class AgentLLM:
         tool_call = self._nlu_layer(user_message)
         
         if not tool_call:
-            return "I didn't understand that request. Try 'Assign P001 to PRJ001' or 'Check conflicts for PRJ001'."
+            return self.UNKNOWN_REPLY
             
         logging.info(f"NLU Identified Tool: {tool_call}")
         
         # Execute Tool
         result = self._execute_tool(tool_call)
         
-        # Generate Response using LLM
-        if self.client:
-             return self._generate_ai_response(user_message, result)
+        # Only conflict explanations go back to the LLM; lists, tables and successes use templates
+        if self.client and response_policy.needs_llm(tool_call, result):
+             return self._generate_ai_response(user_message, result, tool_call)
         else:
              return self._generate_response_fallback(user_message, tool_call, result)
 
+    async def aprocess_message(self, user_message):
+        """
+        Async variant of process_message, as an async generator of reply chunks.
+        Template replies arrive as a single chunk; LLM explanations are streamed
+        token by token.
+        """
+        tool_call = await self._anlu_layer(user_message)
+
+        if not tool_call:
+            yield self.UNKNOWN_REPLY
+            return
+
+        logging.info(f"NLU Identified Tool: {tool_call}")
+
+        result = await self._aexecute_tool(tool_call)
+
+        if self.client and response_policy.needs_llm(tool_call, result):
+            async for token in self._astream_ai_response(user_message, result, tool_call):
+                yield token
+        else:
+            yield self._generate_response_fallback(user_message, tool_call, result)
+
     def _nlu_layer(self, text):
-        clean_text = text.lower().strip()
-        
-        # 1. Fast Path: General Chat (Strict Check)
-        if re.search(r"\b(hello|hi|hey|greetings)\b", clean_text) and len(clean_text) < 20:
-             return {"tool": "general_chat", "reply": "Hello! AeroAgent online. How can I help?"}
+        # 1. Fast Path: router and NLU cache, no network
+        routed, tool_call = self._nlu_fast_path(text)
+        if tool_call is not None:
+            return tool_call
 
         # 2. Try LLM
         if self.client:
             try:
-                response = self.client.chat.completions.create(
-                    model="openai/gpt-4o-mini",
-                    messages=[
-                        {"role": "system", "content": self.system_prompt},
-                        {"role": "user", "content": text}
-                    ],
-                    temperature=0.1
-                )
-                content = response.choices[0].message.content
-                # Clean markdown code blocks if present
-                content = content.replace("```json", "").replace("```", "").strip()
-                return json.loads(content)
+                response = self.client.chat.completions.create(**self._nlu_request(text))
+                return self._parse_nlu(text, response.choices[0].message.content)
             except Exception as e:
                 logging.error(f"LLM Error: {e}. Falling back to Regex.")
-                
-        # 3. Regex Fallback
-        
-        # Assign Pilot
-        match = re.search(r"assign (p\d+) to (prj\d+)", clean_text)
-        if match:
-             return {"tool": "assign_pilot", "pilot_id": match.group(1).upper(), "project_id": match.group(2).upper(), "force": "override" in clean_text}
-
-         # Assign Drone
-        match = re.search(r"assign (d\d+) to (prj\d+)", clean_text)
-        if match:
-             return {"tool": "assign_drone", "drone_id": match.group(1).upper(), "project_id": match.group(2).upper(), "force": "override" in clean_text}
-
-        # Check Conflicts
-        match = re.search(r"check conflicts for (prj\d+)", clean_text)
-        if match:
-             return {"tool": "check_conflicts", "project_id": match.group(1).upper()}
-
-        # Suggest Reassignment / Urgent
-        match = re.search(r"urgent.*(prj\d+)", clean_text)
-        if match:
-             return {"tool": "suggest_reassignment", "project_id": match.group(1).upper(), "urgent": True}
-        
-        # Available/Generic Queries
-        filters = {}
-        
-        # Query Drones
-        if "drone" in clean_text:
-             filters = {}
-             if "available" in clean_text: filters["status"] = "Available"
-             if "maintenance" in clean_text: filters["status"] = "Maintenance"
-             return {"tool": "query_drones", "filters": filters}
-
-        # Query Missions
-        if "mission" in clean_text or "project" in clean_text:
-             return {"tool": "query_missions", "filters": {}}
-
-        # Query Pilots
-        if "available" in clean_text or "show" in clean_text or "list" in clean_text or "who" in clean_text or "give" in clean_text or "all" in clean_text or "pilot" in clean_text:
-             filters = {}
-             if "available" in clean_text: filters["status"] = "Available"
-             return {"tool": "query_pilots", "filters": filters}
 
-        return None
+        # 3. Regex Fallback: the router's best low-confidence guess
+        return routed.tool_call if routed else None
 
-        return None
+    async def _anlu_layer(self, text):
+        routed, tool_call = self._nlu_fast_path(text)
+        if tool_call is not None:
+            return tool_call
+
+        if self.client:
+            try:
+                response = await self._async_llm().chat.completions.create(**self._nlu_request(text))
+                return self._parse_nlu(text, response.choices[0].message.content)
+            except Exception as e:
+                logging.error(f"LLM Error: {e}. Falling back to Regex.")
+
+        return routed.tool_call if routed else None
+
+    def _nlu_fast_path(self, text):
+        """Returns (router match, tool call or None) using only the router and the NLU cache."""
+        # Unambiguous commands never reach the LLM
+        routed = self.router.match(text)
+        if self.router.confident(routed):
+            return routed, routed.tool_call
+
+        # LLM answers are cached by templated utterance
+        if self.client:
+            cached = self.nlu_cache.get(text)
+            if cached is not None:
+                logging.info(f"NLU cache hit ({self.nlu_cache.stats()['hit_rate']:.0%} hit rate)")
+                return routed, cached
+        return routed, None
+
+    def _nlu_request(self, text):
+        return {
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": self.system_prompt},
+                {"role": "user", "content": text}
+            ],
+            "temperature": 0.1,
+        }
+
+    def _parse_nlu(self, text, content):
+        # Clean markdown code blocks if present
+        content = content.replace("```json", "").replace("```", "").strip()
+        tool_call = json.loads(content)
+        if isinstance(tool_call, list):
+            tool_call = {"tool": "batch", "calls": tool_call}
+        if isinstance(tool_call, dict) and tool_call.get("tool"):
+            self.nlu_cache.put(text, tool_call)
+        return tool_call
+
+    def stats(self):
+        return {"router": self.router.stats(), "nlu_cache": self.nlu_cache.stats()}
+
+    def _save_nlu_cache(self):
+        try:
+            self.nlu_cache.save()
+            logging.info(f"NLU stats: {self.stats()}")
+        except Exception as e:
+            logging.error(f"Could not save NLU cache: {e}")
 
     def _execute_tool(self, tool_call):
         try:
             tool = tool_call.get("tool")
             if tool == "general_chat":
                 return {"message": tool_call.get("reply", "I am AeroAgent.")}
+            if tool == "batch":
+                return self._execute_batch(tool_call.get("calls", []))
 
             # --- DIRECT MODE (No API) ---
             if self.direct_mode:
@@ -166,6 +237,8 @@ class AgentLLM:
                         pilot_id=tool_call.get("pilot_id"), 
                         drone_id=tool_call.get("drone_id")
                     )}
+                elif tool == "scan_conflicts":
+                    return {"results": self.logic.scan_all_conflicts()}
                 elif tool == "find_matches":
                     pid = tool_call.get("project_id", "").replace(" ", "").upper()
                     return self.logic.find_matches(pid)
@@ -186,9 +259,17 @@ class AgentLLM:
                          override_soft_conflicts=tool_call.get("force", False)
                     )
                 elif tool == "suggest_reassignment":
-                    return {"suggestions": self.logic.suggest_reassignments(
+                    suggestions = self.logic.suggest_reassignments(
                         tool_call.get("project_id"), urgent_mode=tool_call.get("urgent", False)
-                    )}
+                    )
+                    chains = self.logic.reassignment_chains(tool_call.get("project_id"))["chains"] if suggestions else []
+                    return {"suggestions": suggestions, "chains": chains}
+                elif tool == "plan_assignments":
+                    return self.logic.plan_assignments(
+                        tool_call.get("project_ids") or None,
+                        confirm=tool_call.get("force", False),
+                        override_soft_conflicts=tool_call.get("force", False)
+                    )
                 elif tool == "query_pilots":
                     return self.logic.query_pilots(tool_call.get("filters", {}))
                 elif tool == "query_drones":
@@ -197,97 +278,186 @@ class AgentLLM:
                     return self.logic.query_missions(tool_call.get("filters", {}))
             
             # --- API MODE (Legacy) ---
-            if tool == "check_conflicts":
-                resp = requests.post(f"{self.api_url}/conflicts/check", json={
-                    "project_id": tool_call.get("project_id"),
-                    "pilot_id": tool_call.get("pilot_id"),
-                    "drone_id": tool_call.get("drone_id")
-                })
-                return resp.json()
-
-            elif tool == "find_matches":
-                 project_id = tool_call.get("project_id", "").replace(" ", "").upper()
-                 resp = requests.get(f"{self.api_url}/project/{project_id}/matches")
-                 return resp.json()
-
-            elif tool == "assign_pilot":
-                 resp = requests.post(f"{self.api_url}/assign", json={
-                    "project_id": tool_call.get("project_id"),
-                    "resource_id": tool_call.get("pilot_id"),
-                    "resource_type": "pilot",
-                    "confirm": tool_call.get("force", False),
-                    "override_soft_conflicts": tool_call.get("force", False) # Simplify logic for now
-                })
-                 return resp.json()
-
-            elif tool == "assign_drone":
-                 resp = requests.post(f"{self.api_url}/assign", json={
-                    "project_id": tool_call.get("project_id"),
-                    "resource_id": tool_call.get("drone_id"),
-                    "resource_type": "drone",
-                    "confirm": tool_call.get("force", False),
-                    "override_soft_conflicts": tool_call.get("force", False)
-                })
-                 return resp.json()
-            
-            elif tool == "suggest_reassignment":
-                resp = requests.post(f"{self.api_url}/reassign/suggest", json={
-                     "project_id": tool_call.get("project_id"),
-                     "urgent": tool_call.get("urgent", False)
-                })
-                return resp.json()
-                
-            elif tool == "query_pilots":
-                 resp = requests.post(f"{self.api_url}/pilots/query", json={"filters": tool_call.get("filters", {})})
-                 return resp.json()
-
-            elif tool == "query_drones":
-                 resp = requests.post(f"{self.api_url}/drones/query", json={"filters": tool_call.get("filters", {})})
-                 return resp.json()
-
-            elif tool == "query_missions":
-                 resp = requests.post(f"{self.api_url}/missions/query", json={"filters": tool_call.get("filters", {})})
-                 return resp.json()
-                 
+            request = self._api_request(tool_call)
+            if request:
+                method, path, body = request
+                return self.api.request(method, path, json=body, idempotent=tool in self.READ_ONLY_TOOLS)
+
         except Exception as e:
             return {"error": str(e)}
 
-    def _generate_ai_response(self, user_text, tool_result):
+    def _execute_batch(self, calls):
+        """
+        Runs a list of tool calls. All assignments go through one assign batch
+        (Logic.assign_batch or /assign:batch: one conflict pass, one save);
+        other calls run in order.
+        Returns {"results": [{"tool_call": ..., "result": ...}, ...]}.
+        """
+        calls = [c for c in calls if isinstance(c, dict) and c.get("tool") not in (None, "batch")]
+        results = [None] * len(calls)
+        assigns = [i for i, c in enumerate(calls) if c["tool"] in ("assign_pilot", "assign_drone")]
+        if assigns:
+            items = [{
+                "project_id": calls[i].get("project_id"),
+                "pilot_id": calls[i].get("pilot_id") if calls[i]["tool"] == "assign_pilot" else None,
+                "drone_id": calls[i].get("drone_id") if calls[i]["tool"] == "assign_drone" else None,
+                "confirm": calls[i].get("force", False),
+                "override_soft_conflicts": calls[i].get("force", False),
+            } for i in assigns]
+            items = [{k: v for k, v in item.items() if v is not None} for item in items]
+            if self.direct_mode:
+                batch_results = self.logic.assign_batch(items)
+            else:
+                batch_results = self.api.request("POST", "/assign:batch", json={"items": items})["results"]
+            for i, result in zip(assigns, batch_results):
+                results[i] = result
+        for i, call in enumerate(calls):
+            if results[i] is None:
+                results[i] = self._execute_tool(call)
+        return {"results": [{"tool_call": c, "result": r} for c, r in zip(calls, results)]}
+
+    async def _aexecute_tool(self, tool_call):
+        if self.direct_mode or tool_call.get("tool") in ("general_chat", "batch"):
+            # Logic calls are synchronous; run them off the event loop
+            return await asyncio.to_thread(self._execute_tool, tool_call)
+        try:
+            request = self._api_request(tool_call)
+            if request:
+                method, path, body = request
+                return await self.api.arequest(method, path, json=body,
+                                               idempotent=tool_call.get("tool") in self.READ_ONLY_TOOLS)
+        except Exception as e:
+            return {"error": str(e)}
+
+    def _async_llm(self):
+        if self._async_client is None:
+            self._async_client = AsyncOpenAI(base_url=self.base_url, api_key=self.api_key)
+        return self._async_client
+
+    async def aclose(self):
+        """Closes the async clients; call from the event loop that used them."""
+        if self._async_client is not None:
+            await self._async_client.close()
+            self._async_client = None
+        await self.api.aclose()
+
+    def _api_request(self, tool_call):
+        """Maps a tool call to (method, path, json body) on api.py, or None for unknown tools."""
+        tool = tool_call.get("tool")
+        if tool == "check_conflicts":
+            return "POST", "/conflicts/check", {
+                "project_id": tool_call.get("project_id"),
+                "pilot_id": tool_call.get("pilot_id"),
+                "drone_id": tool_call.get("drone_id")
+            }
+
+        elif tool == "scan_conflicts":
+            return "GET", "/conflicts/scan", None
+
+        elif tool == "find_matches":
+             project_id = tool_call.get("project_id", "").replace(" ", "").upper()
+             return "GET", f"/project/{project_id}/matches", None
+
+        elif tool == "assign_pilot":
+             return "POST", "/assign", {
+                "project_id": tool_call.get("project_id"),
+                "resource_id": tool_call.get("pilot_id"),
+                "resource_type": "pilot",
+                "confirm": tool_call.get("force", False),
+                "override_soft_conflicts": tool_call.get("force", False) # Simplify logic for now
+            }
+
+        elif tool == "assign_drone":
+             return "POST", "/assign", {
+                "project_id": tool_call.get("project_id"),
+                "resource_id": tool_call.get("drone_id"),
+                "resource_type": "drone",
+                "confirm": tool_call.get("force", False),
+                "override_soft_conflicts": tool_call.get("force", False)
+            }
+
+        elif tool == "suggest_reassignment":
+            return "POST", "/reassign/suggest", {
+                 "project_id": tool_call.get("project_id"),
+                 "urgent": tool_call.get("urgent", False)
+            }
+
+        elif tool == "plan_assignments":
+            return "POST", "/assignments/plan", {
+                 "project_ids": tool_call.get("project_ids") or None,
+                 "confirm": tool_call.get("force", False),
+                 "override_soft_conflicts": tool_call.get("force", False)
+            }
+
+        elif tool == "query_pilots":
+             return "POST", "/pilots/query", {"filters": tool_call.get("filters", {})}
+
+        elif tool == "query_drones":
+             return "POST", "/drones/query", {"filters": tool_call.get("filters", {})}
+
+        elif tool == "query_missions":
+             return "POST", "/missions/query", {"filters": tool_call.get("filters", {})}
+        return None
+
+    def _generate_ai_response(self, user_text, tool_result, tool_call=None):
         """
         Uses the LLM to format the API result into a natural language response
         based on the user's original query.
         """
         try:
-            system_msg = """
-            You are AeroAgent. You have just executed an operational tool based on the user's request.
-            
-            INPUT CONTEXT:
-            1. User's Original Query
-            2. Raw JSON Result from the Tool
-            
-            YOUR JOB:
-            - Answer the user's question using the Tool Result.
-            - **PRIORITY 1**: If the Tool Result contains a specific message (e.g. "Hello!...", "Assignment Failed..."), use that as the core of your answer. Do not ignore it.
-            - **PRIORITY 2 (CONFLICTS)**: If the result lists conflicts or errors, list **ALL** of them (Type, Severity, Message) as bullet points.
-            - **REQUIRED: CONFLICT SUMMARY**: At the very end of the conflict list, add a single bold line: "**Recommendation:** [One sentence summary of how to resolve this]."
-            - **PRIORITY 3 (EMPTY RESULT)**: If the tool result is an empty list `[]` or says "No ... found", clearly state "No results found matching your criteria."
-            - **PRIORITY 4 (CANCELLATION)**: ONLY if the User's Query STARTS WITH a clear refusal (e.g. "no", "cancel", "stop", "don't") AND the tool result is generic/empty, THEN reply with: "Action cancelled. How else can I help?"
-            - Be concise professional.
-            """
-            
-            response = self.client.chat.completions.create(
-                model="openai/gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": system_msg},
-                    {"role": "user", "content": f"User Query: {user_text}\n\nTool Result: {json.dumps(tool_result, indent=2)}"}
-                ],
-                temperature=0.2
-            )
+            response = self.client.chat.completions.create(**self._nlg_request(user_text, tool_result))
             return response.choices[0].message.content
         except Exception as e:
             logging.error(f"Response Gen Error: {e}")
+            if tool_call:
+                return self._generate_response_fallback(user_text, tool_call, tool_result)
             return f"Error generating response: {e}. Raw Result: {tool_result}"
 
+    async def _astream_ai_response(self, user_text, tool_result, tool_call):
+        streamed = False
+        try:
+            stream = await self._async_llm().chat.completions.create(stream=True, **self._nlg_request(user_text, tool_result))
+            async for chunk in stream:
+                token = chunk.choices[0].delta.content if chunk.choices else None
+                if token:
+                    streamed = True
+                    yield token
+        except Exception as e:
+            logging.error(f"Response Gen Error: {e}")
+            if streamed:
+                yield f"\n\n⚠️ Response interrupted: {e}"
+            else:
+                yield self._generate_response_fallback(user_text, tool_call, tool_result)
+
+    def _nlg_request(self, user_text, tool_result):
+        system_msg = """
+        You are AeroAgent. You have just executed an operational tool based on the user's request.
+        
+        INPUT CONTEXT:
+        1. User's Original Query
+        2. Raw JSON Result from the Tool
+        
+        YOUR JOB:
+        - Answer the user's question using the Tool Result.
+        - **PRIORITY 1**: If the Tool Result contains a specific message (e.g. "Hello!...", "Assignment Failed..."), use that as the core of your answer. Do not ignore it.
+        - **PRIORITY 2 (CONFLICTS)**: If the result lists conflicts or errors, list **ALL** of them (Type, Severity, Message) as bullet points.
+        - **REQUIRED: CONFLICT SUMMARY**: At the very end of the conflict list, add a single bold line: "**Recommendation:** [One sentence summary of how to resolve this]."
+        - **PRIORITY 3 (EMPTY RESULT)**: If the tool result is an empty list `[]` or says "No ... found", clearly state "No results found matching your criteria."
+        - **PRIORITY 4 (CANCELLATION)**: ONLY if the User's Query STARTS WITH a clear refusal (e.g. "no", "cancel", "stop", "don't") AND the tool result is generic/empty, THEN reply with: "Action cancelled. How else can I help?"
+        - **TRUNCATED RESULTS**: If the Tool Result has a "summary", some items were left out; give the totals from it.
+        - Be concise professional.
+        """
+        # Large scans are trimmed to a token budget, with counts of what was dropped
+        payload = response_policy.fit_to_budget(tool_result, self.response_token_budget)
+        return {
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": system_msg},
+                {"role": "user", "content": f"User Query: {user_text}\n\nTool Result: {response_policy.compact_json(payload)}"}
+            ],
+            "temperature": 0.2,
+        }
+
     def _generate_response_fallback(self, user_text, tool_call, result):
         # ... (Old Code logic preserved as fallback) ...
         if "error" in result:
@@ -297,6 +467,17 @@ class AgentLLM:
         
         if tool == "general_chat":
              return result.get("message")
+
+        if tool == "batch":
+             items = result.get("results", [])
+             if not items:
+                 return "No commands found in that message."
+             ok = sum(1 for item in items if isinstance(item["result"], dict) and item["result"].get("success"))
+             msg = f"**Batch of {len(items)} commands** ({ok} succeeded):\n\n"
+             for n, item in enumerate(items, 1):
+                 reply = self._generate_response_fallback(user_text, item["tool_call"], item["result"] or {})
+                 msg += f"**{n}.** {reply}\n\n"
+             return msg
         
         if tool == "check_conflicts":
              if not result.get("conflicts"):
@@ -306,6 +487,16 @@ class AgentLLM:
                  msg += f"- **{c['severity']}**: {c['message']}\n"
              return msg
 
+        if tool == "scan_conflicts":
+             results = result.get("results", [])
+             if not results:
+                 return "✅ **No conflicts found** in current assignments."
+             msg = f"⚠️ **{len(results)} Assignments with Conflicts**:\n"
+             for r in results:
+                 resource = r.get("pilot_id") or r.get("drone_id")
+                 msg += f"- **{r['project_id']} / {resource}**: " + "; ".join(f"{c['severity']}: {c['message']}" for c in r["conflicts"]) + "\n"
+             return msg
+
         if tool == "find_matches":
              pilots = result.get("pilots", [])
              if not pilots:
@@ -331,7 +522,13 @@ class AgentLLM:
                  for p in ineligible[:3]: # Show top 3 partial matches
                      issues = ", ".join(p.get('issues', []))
                      msg += f"- **{p['name']}** ({p['location']}): {issues}\n"
-             
+
+             pairs = [p for p in result.get("pairs", []) if p.get("eligible")]
+             if pairs:
+                 msg += "\n🚁 **Best Pilot + Drone Pairs**:\n"
+                 for p in pairs[:3]:
+                     msg += f"- **{p['pilot']['name']}** ({p['pilot_id']}) with {p['drone']['model']} ({p['drone_id']}) in {p['location']}, score {p['score']}\n"
+
              return msg
              
         if tool == "assign_pilot" or tool == "assign_drone":
@@ -353,6 +550,36 @@ class AgentLLM:
              msg = "🚑 **Urgent Reassignment Options**:\n"
              for s in sugg:
                  msg += f"- {s}\n"
+             chains = result.get("chains", [])
+             if chains:
+                 msg += "\n🔁 **Least Disruptive Plans**:\n"
+                 for n, chain in enumerate(chains, 1):
+                     steps = "; ".join(f"{m['name']} ({m['pilot_id']}) {m['from'] or 'free'} → {m['to']}" for m in chain["moves"])
+                     if chain.get("unstaffed"):
+                         steps += f"; {chain['unstaffed']} left unstaffed"
+                     msg += f"{n}. {steps} (disruption {chain['disruption']})\n"
+             return msg
+
+        if tool == "plan_assignments":
+             plan = result.get("assignments", [])
+             unassigned = result.get("unassigned", [])
+             if not plan and not unassigned:
+                 return "✅ No open missions to staff."
+             applied = result.get("applied")
+             if applied is not None:
+                 ok = sum(1 for r in applied if r.get("success"))
+                 msg = f"✅ **Applied plan**: {ok} of {len(applied)} missions staffed.\n\n"
+             else:
+                 msg = f"📋 **Assignment Plan** ({len(plan)} missions, total score {result.get('total_score')}, {result.get('method')}):\n\n"
+             if plan:
+                 import pandas as pd
+                 df = pd.DataFrame(plan)
+                 df["soft_conflicts"] = df["conflicts"].apply(len)
+                 msg += df[["project_id", "pilot_id", "drone_id", "location", "score", "soft_conflicts"]].to_markdown(index=False) + "\n\n"
+             for u in unassigned:
+                 msg += f"- ❌ **{u['project_id']}**: {u['reason']}\n"
+             if applied is None and plan:
+                 msg += "\nTo apply it, please type: **'Override and plan assignments'**"
              return msg
 
         if tool == "query_pilots":
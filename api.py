@@ -1,14 +1,76 @@
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-from typing import List, Optional
+import gzip
+import json
+import os
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from starlette.responses import PlainTextResponse
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional, Union
+import numpy as np
 import uvicorn
-from data_manager import DataManager
+import paging
+from data_manager import DataManager, KEY_COLUMNS
 from logic import Logic
+from response_cache import ResponseCache
 
-app = FastAPI()
-dm = DataManager()
+# AEROAGENT_WORKERS > 1 starts several uvicorn worker processes. They share one
+# journal file (storage="journal", shared=True) and serialise writes with a file lock.
+WORKERS = int(os.getenv("AEROAGENT_WORKERS", "1"))
+SHARED = WORKERS > 1 or os.getenv("AEROAGENT_SHARED", "").lower() in ("1", "true", "yes")
+# AEROAGENT_STORAGE=sqlite keeps the tables in AEROAGENT_DB instead (any number of workers)
+STORAGE = os.getenv("AEROAGENT_STORAGE") or ("journal" if SHARED else "csv")
+
+# Write-behind: assignments return before the CSV/Sheets write happens
+dm = DataManager(write_behind=True, storage=STORAGE, shared=SHARED, db_file=os.getenv("AEROAGENT_DB", "aeroagent.db"))
 logic = Logic(dm)
 
+@asynccontextmanager
+async def lifespan(app):
+    yield
+    # Push any queued saves before the worker exits
+    dm.close()
+
+class GzipRequestMiddleware:
+    """Inflates request bodies sent with Content-Encoding: gzip (APIClient(compress=True))."""
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        headers = scope.get("headers", []) if scope["type"] == "http" else []
+        if (b"content-encoding", b"gzip") not in [(k.lower(), v.lower()) for k, v in headers]:
+            return await self.app(scope, receive, send)
+
+        body, more = b"", True
+        while more:
+            message = await receive()
+            body += message.get("body", b"")
+            more = message.get("more_body", False)
+        try:
+            body = gzip.decompress(body)
+        except (OSError, EOFError):
+            return await PlainTextResponse("Invalid gzip request body", status_code=400)(scope, receive, send)
+
+        headers = [(k, v) for k, v in headers if k.lower() not in (b"content-encoding", b"content-length")]
+        scope = dict(scope, headers=headers + [(b"content-length", str(len(body)).encode())])
+        delivered = False
+
+        async def inflated_receive():
+            nonlocal delivered
+            if delivered:
+                return await receive()
+            delivered = True
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        await self.app(scope, inflated_receive, send)
+
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(GzipRequestMiddleware)
+# Large query results (full rosters) go out compressed to clients that accept it
+app.add_middleware(GZipMiddleware, minimum_size=1000)
+
 # --- Schemas ---
 class ConflictCheckRequest(BaseModel):
     project_id: str
@@ -22,54 +84,181 @@ class AssignmentRequest(BaseModel):
     confirm: bool = False
     override_soft_conflicts: bool = False
 
+class BatchItem(BaseModel):
+    project_id: str
+    pilot_id: Optional[str] = None
+    drone_id: Optional[str] = None
+    confirm: Optional[bool] = None # per-item override of the batch setting
+    override_soft_conflicts: Optional[bool] = None
+
+class ConflictCheckBatchRequest(BaseModel):
+    items: List[BatchItem]
+
+class AssignBatchRequest(BaseModel):
+    items: List[BatchItem]
+    mode: Literal["best_effort", "all_or_nothing"] = "best_effort"
+    confirm: bool = False
+    override_soft_conflicts: bool = False
+
+class PlanRequest(BaseModel):
+    project_ids: Optional[List[str]] = None # default: every open mission
+    confirm: bool = False
+    override_soft_conflicts: bool = False
+    time_limit: float = Field(10.0, gt=0, le=120)
+
 class ReassignmentRequest(BaseModel):
     project_id: str
     urgent: bool = False
 
+class ReassignmentChainsRequest(BaseModel):
+    project_id: str
+    max_hops: int = Field(3, ge=1, le=6)
+    time_budget: float = Field(1.0, gt=0, le=30) # seconds
+    limit: int = Field(5, ge=1, le=50)
+
 # --- Endpoints ---
 
+# Handlers are plain `def` on purpose: they run CPU-bound pandas work and block on
+# DataManager's readers-writer lock, so FastAPI runs them on its threadpool. As
+# `async def` they would stall the event loop instead. Concurrent requests are
+# made safe by dm.read()/dm.transaction(); throughput grows with workers and cores.
+
+# Read endpoints carry an ETag derived from DataManager.data_tag(): a client
+# sending it back in If-None-Match gets a 304 until the data changes. Workers
+# sharing a journal or SQLite database give the same tag for the same data.
+# Rendered bodies are cached per request under the same tag.
+response_cache = ResponseCache(max_size=int(os.getenv("RESPONSE_CACHE_SIZE", "256")))
+
+def _etag_matches(request, etag):
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    # Weak comparison: proxies may drop or add the W/ prefix
+    tags = [t.strip().removeprefix("W/") for t in header.split(",")]
+    return "*" in tags or etag.removeprefix("W/") in tags
+
+def _cached_json(request, key, build):
+    """
+    Serves a read endpoint: 304 if the client's ETag is current, else the
+    cached body for `key` (None disables caching), else build() -> (body, headers).
+    """
+    with dm.read():
+        etag = f'W/"{dm.data_tag()}"'
+        if _etag_matches(request, etag):
+            return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+        hit = response_cache.get(key, etag) if key is not None else None
+        if hit is None:
+            body, headers = build()
+            hit = (JSONResponse(jsonable_encoder(body)).body, headers)
+            if key is not None:
+                response_cache.put(key, etag, hit)
+    content, headers = hit
+    return Response(content, media_type="application/json", headers={**headers, "ETag": etag, "Cache-Control": "no-cache"})
+
+# Query endpoints return a JSON list of every matching row, as before paging
+# existed. Callers opt into pages by sending `limit` or `cursor`: they get at
+# most `limit` rows (default paging.DEFAULT_LIMIT) and, when more remain, the
+# next page's cursor in X-Next-Cursor. X-Total-Count always carries the number
+# of matching rows. `fields` projects the columns. With
+# "Accept: application/x-ndjson" the whole result (from `cursor` on, up to
+# `limit` if given) is streamed one row per line.
+
+class QueryRequest(BaseModel):
+    filters: dict
+    fields: Optional[Union[List[str], str]] = None
+    limit: Optional[int] = Field(None, ge=1, le=paging.MAX_LIMIT)
+    cursor: Optional[str] = None
+
+def _query_response(request, table, select, fields=None, limit=None, cursor=None, key=None):
+    """select() returns the matching row positions; it runs under the same read lock as the page."""
+    frame = getattr(dm, table)
+    try:
+        fields = paging.parse_fields(fields, frame.columns)
+        if cursor:
+            cursor = paging.decode_cursor(cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    def resume_after():
+        if not cursor:
+            return None
+        position, row_key = cursor
+        after = dm.position_of(table, row_key, hint=position)
+        return position if after is None else after # the row is gone; carry on from where it was
+
+    if "application/x-ndjson" in request.headers.get("accept", ""):
+        with dm.read():
+            positions = select()
+            rows, _ = paging.page(positions, resume_after(), limit or len(positions))
+        def fetch(chunk):
+            # Short read lock per chunk so a slow client never holds off writers
+            with dm.read():
+                frame = getattr(dm, table)
+                return paging.records(frame, chunk[chunk < len(frame)], fields)
+        return StreamingResponse(paging.ndjson(fetch, rows), media_type="application/x-ndjson")
+
+    def build():
+        positions = select()
+        # No limit or cursor: an unpaged caller, which expects the full list
+        page_size = limit or (paging.DEFAULT_LIMIT if cursor else max(len(positions), 1))
+        rows, has_more = paging.page(positions, resume_after(), page_size)
+        frame = getattr(dm, table)
+        headers = {"X-Total-Count": str(len(positions))}
+        if has_more:
+            last = int(rows[-1])
+            headers["X-Next-Cursor"] = paging.encode_cursor(last, frame[KEY_COLUMNS[table]].iat[last])
+        return paging.records(frame, rows, fields), headers
+    return _cached_json(request, key, build)
+
 @app.get("/pilots/available")
-def get_pilots(status: Optional[str] = "Available"):
+def get_pilots(request: Request, status: Optional[str] = "Available", fields: Optional[str] = None,
+               limit: Optional[int] = Query(None, ge=1, le=paging.MAX_LIMIT), cursor: Optional[str] = None):
+    key = ("pilots/available", status, fields, limit, cursor)
+    return _query_response(request, "pilots", lambda: _pilots_by_status(status), fields, limit, cursor, key)
+
+def _pilots_by_status(status):
+    statuses = dm.pilots['status']
     if status and status.lower() == "all":
-        return dm.pilots.to_dict(orient='records')
+        return np.arange(len(statuses))
     elif status and status.lower() == "unavailable":
-         return dm.pilots[dm.pilots['status'] != 'Available'].to_dict(orient='records')
+        return np.flatnonzero((statuses != 'Available').to_numpy())
     elif status:
-        return dm.pilots[dm.pilots['status'] == status].to_dict(orient='records')
-    return dm.pilots.to_dict(orient='records')
-
-class QueryPilotsRequest(BaseModel):
-    filters: dict
+        return np.flatnonzero((statuses == status).to_numpy())
+    return np.arange(len(statuses))
 
 @app.post("/pilots/query")
-def query_pilots(req: QueryPilotsRequest):
-    return dm.pilots.to_dict(orient='records') # Fallback if logic not called, but let's use logic
-    # Actually, we should use logic.query_pilots
-    return logic.query_pilots(req.filters)
+def query_pilots(req: QueryRequest, request: Request):
+    key = ("pilots/query", json.dumps(req.model_dump(), sort_keys=True, default=str))
+    return _query_response(request, "pilots", lambda: logic.filter_positions("pilots", req.filters), req.fields, req.limit, req.cursor, key)
 
 @app.get("/project/{project_id}/matches")
-def get_project_matches(project_id: str):
-    return logic.find_matches(project_id)
-
-class QueryDronesRequest(BaseModel):
-    filters: dict
-
-class QueryMissionsRequest(BaseModel):
-    filters: dict
+def get_project_matches(project_id: str, request: Request):
+    return _cached_json(request, ("matches", project_id), lambda: (logic.find_matches(project_id), {}))
 
 @app.post("/drones/query")
-def query_drones(req: QueryDronesRequest):
-    return logic.query_drones(req.filters)
+def query_drones(req: QueryRequest, request: Request):
+    key = ("drones/query", json.dumps(req.model_dump(), sort_keys=True, default=str))
+    return _query_response(request, "drones", lambda: logic.filter_positions("drones", req.filters), req.fields, req.limit, req.cursor, key)
 
 @app.post("/missions/query")
-def query_missions(req: QueryMissionsRequest):
-    return logic.query_missions(req.filters)
+def query_missions(req: QueryRequest, request: Request):
+    key = ("missions/query", json.dumps(req.model_dump(), sort_keys=True, default=str))
+    return _query_response(request, "missions", lambda: logic.filter_positions("missions", req.filters), req.fields, req.limit, req.cursor, key)
 
 @app.post("/conflicts/check")
 def check_conflicts(req: ConflictCheckRequest):
     conflicts = logic.check_conflicts(req.project_id, req.pilot_id, req.drone_id)
     return {"conflicts": conflicts}
 
+@app.post("/conflicts/check:batch")
+def check_conflicts_batch(req: ConflictCheckBatchRequest):
+    """check_conflicts for every item, against one consistent snapshot."""
+    return {"results": logic.check_conflicts_batch([item.model_dump() for item in req.items])}
+
+@app.get("/conflicts/scan")
+def scan_conflicts(request: Request):
+    return _cached_json(request, ("conflicts/scan",), lambda: ({"results": logic.scan_all_conflicts()}, {}))
+
 @app.post("/assign")
 def assign_resource(req: AssignmentRequest):
     return logic.assign_resource(
@@ -80,10 +269,53 @@ def assign_resource(req: AssignmentRequest):
         override_soft_conflicts=req.override_soft_conflicts
     )
 
+@app.post("/assign:batch")
+def assign_batch(req: AssignBatchRequest):
+    """
+    Assigns every item in one transaction with a single save. best_effort keeps
+    the items that succeed; all_or_nothing rolls everything back if one fails.
+    """
+    items = [item.model_dump(exclude_none=True) for item in req.items]
+    results = logic.assign_batch(items, confirm=req.confirm, override_soft_conflicts=req.override_soft_conflicts, mode=req.mode)
+    succeeded = sum(1 for r in results if r.get("success"))
+    return {
+        "mode": req.mode,
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded,
+        "rolled_back": any(r.get("rolled_back") for r in results),
+        "results": results,
+    }
+
+@app.post("/assignments/plan")
+def plan_assignments(req: PlanRequest):
+    """
+    Pilot + co-located drone for every open mission at once, maximising the
+    total match score. A dry run unless confirm=True, which applies the plan
+    as one assign batch.
+    """
+    return logic.plan_assignments(req.project_ids, confirm=req.confirm,
+                                  override_soft_conflicts=req.override_soft_conflicts, time_limit=req.time_limit)
+
 @app.post("/reassign/suggest")
 def suggest_reassignments(req: ReassignmentRequest):
     suggestions = logic.suggest_reassignments(req.project_id, urgent_mode=req.urgent)
-    return {"suggestions": suggestions}
+    # Bump-and-backfill chains, under the same urgency gate as the direct bumps
+    chains = logic.reassignment_chains(req.project_id)["chains"] if suggestions else []
+    return {"suggestions": suggestions, "chains": chains}
+
+@app.post("/reassign/chains")
+def reassignment_chains(req: ReassignmentChainsRequest):
+    """Ranked bump-and-backfill chains that staff a mission, least disruptive first."""
+    return logic.reassignment_chains(req.project_id, max_hops=req.max_hops, time_budget=req.time_budget, limit=req.limit)
+
+@app.post("/sync")
+def sync():
+    """Barrier: returns once all queued saves have been persisted."""
+    return {"flushed": dm.sync(timeout=30)}
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="127.0.0.1", port=8000)
+    if WORKERS > 1:
+        # Workers re-import this module, so the app has to be passed by name
+        uvicorn.run("api:app", host="127.0.0.1", port=8000, workers=WORKERS)
+    else:
+        uvicorn.run(app, host="127.0.0.1", port=8000)
@@ -0,0 +1,100 @@
+import gzip
+import json
+import random
+import time
+import asyncio
+import requests
+from requests.adapters import HTTPAdapter
+
+RETRY_STATUSES = {502, 503, 504}
+
+
+class APIClient:
+    """
+    Pooled HTTP client for the agent -> api.py link.
+
+    One keep-alive requests.Session (and, for aprocess_message, one
+    httpx.AsyncClient) per agent, connect/read timeouts on every call, and
+    bounded retries with full jitter for idempotent requests only; an assign
+    is never replayed. With compress=True, JSON bodies of at least
+    `compress_min_bytes` are sent gzip-encoded (api.py inflates them).
+    """
+    def __init__(self, base_url, connect_timeout=3.0, read_timeout=30.0, retries=2, backoff=0.2,
+                 compress=False, compress_min_bytes=1024, pool_size=10):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = (connect_timeout, read_timeout)
+        self.retries = retries
+        self.backoff = backoff
+        self.compress = compress
+        self.compress_min_bytes = compress_min_bytes
+        self.pool_size = pool_size
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._async_http = None # created on first async use, inside the caller's event loop
+
+    def _encode(self, body):
+        if body is None:
+            return None, {}
+        data = json.dumps(body).encode("utf-8")
+        headers = {"Content-Type": "application/json"}
+        if self.compress and len(data) >= self.compress_min_bytes:
+            data = gzip.compress(data)
+            headers["Content-Encoding"] = "gzip"
+        return data, headers
+
+    def _delay(self, attempt):
+        # Full jitter: spreads retries from several agents instead of syncing them up
+        return random.uniform(0, self.backoff * 2 ** attempt)
+
+    def request(self, method, path, json=None, idempotent=None):
+        """Returns the decoded JSON response. idempotent defaults to True for GET only."""
+        if idempotent is None:
+            idempotent = method.upper() == "GET"
+        data, headers = self._encode(json)
+        attempts = self.retries + 1 if idempotent else 1
+        for attempt in range(attempts):
+            try:
+                resp = self.session.request(method, self.base_url + path, data=data, headers=headers, timeout=self.timeout)
+                if resp.status_code in RETRY_STATUSES and attempt < attempts - 1:
+                    time.sleep(self._delay(attempt))
+                    continue
+                return resp.json()
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt == attempts - 1:
+                    raise
+                time.sleep(self._delay(attempt))
+
+    async def arequest(self, method, path, json=None, idempotent=None):
+        """Async twin of request(), on a pooled httpx.AsyncClient."""
+        import httpx
+        if self._async_http is None:
+            self._async_http = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=httpx.Timeout(self.timeout[1], connect=self.timeout[0]),
+                limits=httpx.Limits(max_keepalive_connections=self.pool_size),
+            )
+        if idempotent is None:
+            idempotent = method.upper() == "GET"
+        data, headers = self._encode(json)
+        attempts = self.retries + 1 if idempotent else 1
+        for attempt in range(attempts):
+            try:
+                resp = await self._async_http.request(method, path, content=data, headers=headers)
+                if resp.status_code in RETRY_STATUSES and attempt < attempts - 1:
+                    await asyncio.sleep(self._delay(attempt))
+                    continue
+                return resp.json()
+            except (httpx.ConnectError, httpx.TimeoutException):
+                if attempt == attempts - 1:
+                    raise
+                await asyncio.sleep(self._delay(attempt))
+
+    def close(self):
+        self.session.close()
+
+    async def aclose(self):
+        if self._async_http is not None:
+            await self._async_http.aclose()
+            self._async_http = None
@@ -65,20 +65,11 @@ st.header("⚠️ Active Conflicts")
 # For now, just a button to scan all
 if st.button("Scan All Assignments for Conflicts"):
     found_conflicts = []
-    # Check all active missions
-    for _, mission in dm.missions.iterrows():
-        pid = mission['project_id']
-        # Find who is assigned to this?
-        # In our CSV, the link is ON the pilot/drone.
-        assigned_pilots = dm.pilots[dm.pilots['current_assignment'] == pid]
-        for _, p in assigned_pilots.iterrows():
-            c = logic.check_conflicts(pid, pilot_id=p['pilot_id'])
-            if c: found_conflicts.append(f"**{pid} / {p['pilot_id']}**: {', '.join(c)}")
-            
-        assigned_drones = dm.drones[dm.drones['current_assignment'] == pid]
-        for _, d in assigned_drones.iterrows():
-            c = logic.check_conflicts(pid, drone_id=d['drone_id'])
-            if c: found_conflicts.append(f"**{pid} / {d['drone_id']}**: {', '.join(c)}")
+    # The link is ON the pilot/drone, so scan every current assignment in one pass
+    for r in logic.scan_all_conflicts():
+        resource = r.get('pilot_id') or r.get('drone_id')
+        messages = [c['message'] for c in r['conflicts']]
+        found_conflicts.append(f"**{r['project_id']} / {resource}**: {', '.join(messages)}")
             
     if found_conflicts:
         for fc in found_conflicts:
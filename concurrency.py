@@ -0,0 +1,104 @@
+import os
+import threading
+from contextlib import contextmanager
+
+
+class RWLock:
+    """
+    Readers-writer lock: any number of readers, or one writer.
+
+    Writers are preferred (new readers wait while a writer is queued) so a
+    stream of queries can't starve assignments. Both sides are reentrant, and
+    the thread holding the write lock may also read. Upgrading a read lock to
+    a write lock is refused rather than deadlocking.
+    """
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = {} # thread id -> read depth
+        self._writer = None
+        self._writer_depth = 0
+        self._waiting_writers = 0
+
+    @contextmanager
+    def read(self):
+        me = threading.get_ident()
+        with self._cond:
+            if self._writer != me and me not in self._readers:
+                while self._writer is not None or self._waiting_writers:
+                    self._cond.wait()
+            self._readers[me] = self._readers.get(me, 0) + 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers[me] -= 1
+                if not self._readers[me]:
+                    del self._readers[me]
+                    self._cond.notify_all()
+
+    def owned(self):
+        """True if the calling thread holds either side of the lock."""
+        me = threading.get_ident()
+        with self._cond:
+            return self._writer == me or me in self._readers
+
+    @contextmanager
+    def write(self):
+        me = threading.get_ident()
+        with self._cond:
+            if self._writer == me:
+                self._writer_depth += 1
+            else:
+                if me in self._readers:
+                    raise RuntimeError("Cannot take the write lock while holding a read lock")
+                self._waiting_writers += 1
+                try:
+                    while self._writer is not None or self._readers:
+                        self._cond.wait()
+                finally:
+                    self._waiting_writers -= 1
+                self._writer = me
+                self._writer_depth = 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writer_depth -= 1
+                if not self._writer_depth:
+                    self._writer = None
+                    self._cond.notify_all()
+
+
+class FileLock:
+    """
+    Exclusive advisory lock on `path` (flock), shared by every process on the
+    host. Reentrant within a process; callers serialise their own threads.
+    """
+    def __init__(self, path):
+        try:
+            import fcntl
+        except ImportError:
+            raise RuntimeError("Shared multi-worker mode needs fcntl (Linux/macOS)")
+        self._fcntl = fcntl
+        self.path = path
+        self._depth = 0
+        self._fd = None
+
+    def __enter__(self):
+        if self._depth == 0:
+            self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                self._fcntl.flock(self._fd, self._fcntl.LOCK_EX)
+            except BaseException:
+                os.close(self._fd)
+                self._fd = None
+                raise
+        self._depth += 1
+        return self
+
+    def __exit__(self, *exc):
+        self._depth -= 1
+        if self._depth == 0:
+            self._fcntl.flock(self._fd, self._fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
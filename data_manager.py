@@ -1,8 +1,23 @@
 import pandas as pd
 import os
+import atexit
+import hashlib
+import json
+import threading
+import uuid
+from contextlib import contextmanager, nullcontext
 import gspread
+from gspread.utils import rowcol_to_a1, numericise_all
 from oauth2client.service_account import ServiceAccountCredentials
 from dotenv import load_dotenv
+import models
+from intervals import IntervalIndex, PointIndex
+from persistence import WriteBehindQueue, Journal, atomic_write_csv
+from snapshot_cache import SnapshotCache
+from sqlite_store import SQLiteStore
+from filter_index import FilterIndex
+from sheets_refresh import SheetsRefresher
+from concurrency import RWLock, FileLock
 
 # Load environment variables
 load_dotenv()
@@ -10,16 +25,78 @@ load_dotenv()
 # Get Sheet ID from env
 SHEET_ID = os.getenv("GOOGLE_SHEET_ID")
 
+# Primary key column of each table
+KEY_COLUMNS = {"pilots": "pilot_id", "drones": "drone_id", "missions": "project_id"}
+# Filter indexes per table: (token columns holding comma-separated lists, hash columns)
+FILTER_INDEX_COLUMNS = {
+    "pilots": (["skills", "certifications"], ["location", "status"]),
+    "drones": (["capabilities"], ["location", "status"]),
+    "missions": (["required_skills", "required_certs"], ["location", "priority"]),
+}
+
+# Google Sheets tab holding each table
+SHEET_TABS = {"pilots": "Pilots", "drones": "Drones", "missions": "Missions"}
+
 class DataManager:
-    def __init__(self, pilot_file="pilot_roster.csv", drone_file="drone_fleet.csv", missions_file="missions.csv"):
+    def __init__(self, pilot_file="pilot_roster.csv", drone_file="drone_fleet.csv", missions_file="missions.csv", sheet=None,
+                 write_behind=False, flush_window=0.5, storage="csv", journal_file="aeroagent.journal", compact_every=1000,
+                 cache_dir=".aeroagent_cache", refresh_interval=None, shared=False, db_file="aeroagent.db"):
         self.pilot_file = pilot_file
         self.drone_file = drone_file
         self.missions_file = missions_file
+        self._csv_files = {"pilots": pilot_file, "drones": drone_file, "missions": missions_file}
+        self._lock = threading.RLock()
+        # Logic holds read() across multi-step reads; mutations and transaction() take the write side
+        self._rw = RWLock()
+        # shared=True: several worker processes use one journal, serialised by a file lock
+        self._file_lock = None
+        self._journal_pos = 0 # journal bytes already applied to the in-memory tables
+        # Data version: bumped on every load, refresh and mutation (ETags, response caches).
+        # The instance id keeps versions from different processes or restarts apart.
+        self.version = 0
+        self._instance_id = uuid.uuid4().hex[:8]
+        # List columns (skills, certifications, capabilities): a generation bumped on every
+        # load/refresh, plus the row positions edited since, so Logic can patch its bitmaps
+        self.list_generation = 0
+        self.list_edits = {table: [] for table in KEY_COLUMNS}
+        # Saves requested inside batch() are deferred and run once per table at the end
+        self._batch_depth = 0
+        self._batched = set()
+        self._writer = None
+        # storage="journal": CSVs are snapshots, mutations are appended to journal_file
+        # and folded into the snapshots every `compact_every` entries
+        self.storage = storage
+        self.compact_every = compact_every
+        self._journal = None
+        self._replaying = False
+        # storage="sqlite": tables live in db_file and every mutation is a row UPDATE.
+        # The CSVs are only read once, to migrate them into an empty database.
+        self._store = None
+        self._store_seq = 0     # last change-log entry applied to the in-memory tables
+        self._store_version = None # PRAGMA data_version when we last caught up
+        # Normalised tables cached on disk, keyed by a fingerprint of the source (None disables)
+        self._snapshots = SnapshotCache(cache_dir) if cache_dir else None
         self.use_sheets = False
         self.sheet = None
+        self._worksheets = {}
+        # tab -> (header, row count) as last read from / written to the sheet
+        self._sheet_shapes = {}
+        # Change detection for the Sheets poller: Drive modifiedTime and per-tab value checksums
+        self._sheet_modified = None
+        self._tab_checksums = {}
+        self._refresher = None
+        # Sheet writes per table: started so far, and still in flight. A tab downloaded
+        # while one of its writes was pending or running must not be swapped in
+        self._sheet_writes = {table: 0 for table in KEY_COLUMNS}
+        self._sheet_saving = {table: 0 for table in KEY_COLUMNS}
         
+        # Spreadsheet passed in directly (e.g. fake_sheets.FakeSpreadsheet for offline use)
+        if sheet is not None:
+            self.sheet = sheet
+            self.use_sheets = True
+
         # Check if Sheet ID exists
-        if not SHEET_ID:
+        elif not SHEET_ID:
             print("⚠️ GOOGLE_SHEET_ID not found in .env. Falling back to CSV.")
         
         # Try connecting to Google Sheets
@@ -56,38 +133,459 @@ class DataManager:
             except Exception:
                 print("⚠️ No credentials found (Local or Secrets). Falling back to CSV.")
         
+        if self.storage == "journal" and not self.use_sheets:
+            if shared:
+                self._file_lock = FileLock(journal_file + ".lock")
+            # Opening trims a torn tail, which must not race another worker's append
+            with self._file_lock or nullcontext():
+                self._journal = Journal(journal_file)
+        elif self.storage == "sqlite" and not self.use_sheets:
+            # SQLite locks the file itself, so several processes can always share it
+            self._store = SQLiteStore(db_file)
+        elif shared:
+            print("⚠️ Shared mode needs storage='journal' or 'sqlite' with local files. Running unshared.")
+
         self.load_data()
 
+        # Write-behind: mutations return immediately, saves are coalesced on a background thread
+        if write_behind:
+            self._writer = WriteBehindQueue(self._persist, window=flush_window)
+
+        # Pick up edits made directly in the Sheet (SHEETS_POLL_INTERVAL seconds, 0 disables)
+        if refresh_interval is None:
+            refresh_interval = float(os.getenv("SHEETS_POLL_INTERVAL", "30"))
+        if self.use_sheets and refresh_interval > 0:
+            self._refresher = SheetsRefresher(self, interval=refresh_interval)
+            self._refresher.start()
+
+        if self._writer is not None or self._refresher is not None:
+            atexit.register(self.close)
+
+    def _worksheet(self, tab_name):
+        # Cache worksheet handles, each sheet.worksheet() call is a metadata request
+        if tab_name not in self._worksheets:
+            self._worksheets[tab_name] = self.sheet.worksheet(tab_name)
+        return self._worksheets[tab_name]
+
     def _load_sheet_df(self, tab_name, required_cols):
         try:
-            worksheet = self.sheet.worksheet(tab_name)
-            data = worksheet.get_all_records()
-            df = pd.DataFrame(data)
-            # Ensure all columns exist and are strings (to match CSV behavior)
-            for col in required_cols:
-                if col not in df.columns:
-                    df[col] = ""
-            return df.astype(str)
+            worksheet = self._worksheet(tab_name)
+            values = worksheet.get_all_values()
+            self._tab_checksums[tab_name] = self._checksum(values)
+            df = self._sheet_values_df(values, required_cols)
+            self._sheet_shapes[tab_name] = (self._sheet_header(values), len(df))
+            return df
         except Exception as e:
             print(f"Error loading {tab_name} from Sheets: {e}")
             return pd.DataFrame(columns=required_cols, dtype=str)
 
+    def _sheet_header(self, values):
+        return list(values[0]) if values else []
+
+    def _sheet_values_df(self, values, required_cols):
+        # Same conversion as worksheet.get_all_records(): pad ragged rows, numericise cells
+        header = self._sheet_header(values)
+        rows = [numericise_all(list(row) + [""] * (len(header) - len(row)), default_blank="") for row in values[1:]]
+        df = pd.DataFrame([dict(zip(header, row)) for row in rows], columns=header)
+        # Ensure all columns exist and are strings (to match CSV behavior)
+        for col in required_cols:
+            if col not in df.columns:
+                df[col] = ""
+        return df.astype(str)
+
+    def _checksum(self, values):
+        return hashlib.sha1(json.dumps(values, default=str).encode()).hexdigest()
+
+    def refresh_from_sheets(self):
+        """
+        Reloads tables whose Sheets tab changed since it was last read.
+        A Drive modifiedTime check gates everything, so an unchanged sheet costs one
+        metadata request. Changed tabs are normalised off to the side and swapped in
+        under the lock. Returns the names of the refreshed tables.
+        """
+        if not self.use_sheets: return []
+        modified = self.sheet.get_lastUpdateTime()
+        if modified == self._sheet_modified:
+            return []
+
+        # Our own queued edits must reach the sheet first, or they'd look like remote changes
+        self.flush()
+        tables = list(KEY_COLUMNS)
+        with self._lock:
+            writes = dict(self._sheet_writes)
+            saving = {table for table, count in self._sheet_saving.items() if count}
+        response = self.sheet.values_batch_get([f"'{SHEET_TABS[t]}'" for t in tables])
+        columns = {"pilots": models.PILOT_COLUMNS, "drones": models.DRONE_COLUMNS, "missions": models.MISSION_COLUMNS}
+
+        changed = {}
+        for table, value_range in zip(tables, response.get("valueRanges", [])):
+            tab_name = SHEET_TABS[table]
+            values = value_range.get("values", [])
+            checksum = self._checksum(values)
+            if checksum == self._tab_checksums.get(tab_name):
+                continue
+            df = self._sheet_values_df(values, columns[table])
+            changed[table] = (df, models.normalise(table, df), checksum, (self._sheet_header(values), len(df)))
+
+        refreshed = []
+        with self._rw.write(), self._lock:
+            complete = True
+            for table, (df, typed, checksum, shape) in changed.items():
+                tab_name = SHEET_TABS[table]
+                if (self._dirty[table] or table in saving or self._sheet_saving[table]
+                        or self._sheet_writes[table] != writes[table]):
+                    # Edited locally meanwhile, or our write may have landed after the download: try again next poll
+                    complete = False
+                    continue
+                self._tab_checksums[tab_name] = checksum
+                self._sheet_shapes[tab_name] = shape
+                if df.equals(getattr(self, table)):
+                    continue # our own write coming back
+                setattr(self, table, df)
+                setattr(self, "typed_" + table, typed)
+                refreshed.append(table)
+            if refreshed:
+                self._rebuild_indexes()
+                print(f"Refreshed from Google Sheets: {', '.join(refreshed)}")
+            if complete:
+                self._sheet_modified = modified
+        return refreshed
+
     def load_data(self):
+        # Don't let queued saves of the old tables land after the reload
+        self.flush()
+
+        with self._rw.write(), self._file_lock or nullcontext(), self._lock:
+            self._load_locked()
+
+    def _load_locked(self):
         # Define Columns
-        cols_pilots = ["pilot_id", "name", "skills", "certifications", "location", "status", "current_assignment", "available_from"]
-        cols_drones = ["drone_id", "model", "capabilities", "status", "location", "current_assignment", "maintenance_due"]
-        cols_missions = ["project_id", "client", "location", "required_skills", "required_certs", "start_date", "end_date", "priority"]
+        cols_pilots = models.PILOT_COLUMNS
+        cols_drones = models.DRONE_COLUMNS
+        cols_missions = models.MISSION_COLUMNS
 
-        if self.use_sheets:
-            print("Loading data from Google Sheets...")
-            self.pilots = self._load_sheet_df("Pilots", cols_pilots)
-            self.drones = self._load_sheet_df("Drones", cols_drones)
-            self.missions = self._load_sheet_df("Missions", cols_missions)
+        # (row position, column) cells changed since the table was last saved
+        self._dirty = {table: set() for table in KEY_COLUMNS}
+        fingerprint = self._source_fingerprint()
+        if fingerprint and "modified" in fingerprint:
+            self._sheet_modified = fingerprint["modified"]
+        elif self.use_sheets:
+            try:
+                self._sheet_modified = self.sheet.get_lastUpdateTime()
+            except Exception:
+                self._sheet_modified = None
+        cached = self._snapshots.load(fingerprint) if fingerprint else None
+        if cached:
+            print("Loading data from snapshot cache...")
+            tables, extra = cached
+            self.pilots, self.typed_pilots = tables["pilots"]
+            self.drones, self.typed_drones = tables["drones"]
+            self.missions, self.typed_missions = tables["missions"]
+            self._sheet_shapes = {tab: (header, rows) for tab, (header, rows) in extra.get("sheet_shapes", {}).items()}
+            self._tab_checksums = extra.get("tab_checksums", {})
         else:
-            print("Loading data from local CSVs...")
-            self.pilots = self._load_csv(self.pilot_file, cols_pilots)
-            self.drones = self._load_csv(self.drone_file, cols_drones)
-            self.missions = self._load_csv(self.missions_file, cols_missions)
+            if self._store is not None:
+                self._load_store()
+            elif self.use_sheets:
+                print("Loading data from Google Sheets...")
+                self.pilots = self._load_sheet_df("Pilots", cols_pilots)
+                self.drones = self._load_sheet_df("Drones", cols_drones)
+                self.missions = self._load_sheet_df("Missions", cols_missions)
+            else:
+                print("Loading data from local CSVs...")
+                self.pilots = self._load_csv(self.pilot_file, cols_pilots)
+                self.drones = self._load_csv(self.drone_file, cols_drones)
+                self.missions = self._load_csv(self.missions_file, cols_missions)
+
+            # Parse dates, skill lists and categories once, so Logic never re-parses strings
+            self.typed_pilots = models.normalise("pilots", self.pilots)
+            self.typed_drones = models.normalise("drones", self.drones)
+            self.typed_missions = models.normalise("missions", self.missions)
+
+            if fingerprint:
+                self._save_snapshot(fingerprint)
+
+        self._rebuild_indexes()
+
+        if self._journal is not None:
+            self._replay_journal()
+
+    def _load_store(self):
+        if self._store.empty():
+            with self._store.transaction():
+                if self._store.empty(): # another process may have migrated meanwhile
+                    print("Migrating local CSVs into SQLite...")
+                    self._store.import_tables({
+                        "pilots": self._load_csv(self.pilot_file, models.PILOT_COLUMNS),
+                        "drones": self._load_csv(self.drone_file, models.DRONE_COLUMNS),
+                        "missions": self._load_csv(self.missions_file, models.MISSION_COLUMNS),
+                    })
+        print("Loading data from SQLite...")
+        # One read transaction, so the three tables come from the same commit
+        with self._store.transaction(immediate=False):
+            self.pilots = self._store.load("pilots", models.PILOT_COLUMNS)
+            self.drones = self._store.load("drones", models.DRONE_COLUMNS)
+            self.missions = self._store.load("missions", models.MISSION_COLUMNS)
+            self._store_seq = self._store.last_seq()
+        self._store_version = self._store.data_version()
+
+    def _source_fingerprint(self):
+        # Cheap identity of the source data: Sheet modifiedTime, or CSV mtime + size
+        if self._snapshots is None or self._store is not None:
+            return None
+        if self.use_sheets:
+            try:
+                return {"sheet": self.sheet.id, "modified": self.sheet.get_lastUpdateTime()}
+            except Exception as e:
+                print(f"Could not read Sheet modifiedTime, skipping snapshot cache: {e}")
+                return None
+        files = {}
+        for table, path in self._csv_files.items():
+            try:
+                st = os.stat(path)
+                files[table] = [os.path.abspath(path), st.st_mtime_ns, st.st_size]
+            except OSError:
+                files[table] = None
+        return {"csv": files}
+
+    def _save_snapshot(self, fingerprint):
+        tables = {table: (getattr(self, table), getattr(self, "typed_" + table)) for table in KEY_COLUMNS}
+        extra = {
+            "sheet_shapes": {tab: [header, rows] for tab, (header, rows) in self._sheet_shapes.items()},
+            "tab_checksums": self._tab_checksums,
+        }
+        try:
+            self._snapshots.save(fingerprint, tables, extra)
+        except Exception as e:
+            print(f"Could not write snapshot cache: {e}")
+
+    def _replay_journal(self):
+        self._replaying = True
+        try:
+            entries, self._journal_pos = self._journal.read_from(0)
+            for table, key, fields in entries:
+                self._set_fields_locked(table, key, fields)
+            count = len(entries)
+            self._journal.entries = count
+        finally:
+            self._replaying = False
+        # Replayed changes are already persisted, nothing to save
+        self._dirty = {table: set() for table in KEY_COLUMNS}
+        if count:
+            print(f"Replayed {count} journal entries.")
+
+    def _rebuild_indexes(self):
+        # id -> first row position, plus caches of record dicts filled on first lookup
+        self.version += 1
+        self.list_generation += 1
+        self.list_edits = {table: [] for table in KEY_COLUMNS}
+        self._index = {}
+        self._duplicates = {}
+        self._records = {}
+        self._typed_records = {}
+        for table, key_col in KEY_COLUMNS.items():
+            keys = getattr(self, table)[key_col].tolist()
+            # Built back to front so the first row of a repeated id wins, like the old mask + iloc[0]
+            index = dict(zip(reversed(keys), range(len(keys) - 1, -1, -1)))
+            duplicates = {}
+            if len(index) != len(keys):
+                # Repeated ids: updates still apply to every row with the id
+                for pos, key in enumerate(keys):
+                    duplicates.setdefault(key, []).append(pos)
+                duplicates = {key: positions for key, positions in duplicates.items() if len(positions) > 1}
+            self._index[table] = index
+            self._duplicates[table] = duplicates
+            self._records[table] = {}
+            self._typed_records[table] = {}
+        # Token/hash indexes behind Logic.filter_positions
+        self.filters = {table: FilterIndex(getattr(self, table), *FILTER_INDEX_COLUMNS[table]) for table in KEY_COLUMNS}
+        self._rebuild_schedule()
+
+    def _rebuild_schedule(self):
+        # Per-resource bookings (mission date ranges) and drone maintenance dates
+        # First row per project_id wins, like get_mission; missions without valid dates book nothing
+        missions = self.typed_missions.drop_duplicates('project_id')
+        missions = missions[missions['start_date'].notna() & missions['end_date'].notna()]
+        mission_dates = dict(zip(missions['project_id'], zip(missions['start_date'], missions['end_date'])))
+
+        self.bookings = {}
+        for table, key_col in (("pilots", "pilot_id"), ("drones", "drone_id")):
+            typed = getattr(self, "typed_" + table)
+            assigned = typed[typed['current_assignment'].isin(mission_dates.keys())]
+            self.bookings[table] = IntervalIndex(
+                (key, *mission_dates[project_id], project_id)
+                for key, project_id in zip(assigned[key_col], assigned['current_assignment'])
+            )
+
+        drones = self.typed_drones[self.typed_drones['maintenance_due'].notna()]
+        self.maintenance = PointIndex(zip(drones['drone_id'], drones['maintenance_due']))
+
+    def _add_booking(self, table, key, project_id):
+        mission = self.get_typed_mission(project_id)
+        if mission and not pd.isna(mission['start_date']) and not pd.isna(mission['end_date']):
+            self.bookings[table].add(key, mission['start_date'], mission['end_date'], project_id)
+
+    def _get_record(self, table, key, typed=False):
+        cache = self._typed_records[table] if typed else self._records[table]
+        record = cache.get(key)
+        if record is None:
+            pos = self._index[table].get(key)
+            if pos is None: return None
+            df = getattr(self, "typed_" + table) if typed else getattr(self, table)
+            record = df.iloc[pos].to_dict()
+            cache[key] = record
+        # Callers may mutate the dict they get back, so hand out a copy
+        return dict(record)
+
+    def _set_fields(self, table, key, fields):
+        with self._exclusive(), self._lock:
+            return self._set_fields_locked(table, key, fields)
+
+    @contextmanager
+    def _exclusive(self):
+        # Lock order: RW write lock, then the cross-process file lock, then self._lock
+        with self._rw.write():
+            if self._store is not None:
+                with self._store_transaction():
+                    yield
+            elif self._file_lock is None:
+                yield
+            else:
+                with self._file_lock:
+                    self._catch_up()
+                    yield
+
+    @contextmanager
+    def _store_transaction(self):
+        # The outermost exclusive section is one SQLite transaction: a check-and-assign
+        # commits as a whole or not at all, and other processes' writes wait for it
+        if self._store.in_transaction:
+            yield
+            return
+        try:
+            with self._store.transaction():
+                self._catch_up_store()
+                yield
+        except BaseException:
+            if self._store.changed:
+                # Rolled back on disk, so drop the same changes from memory
+                with self._lock:
+                    self._load_locked()
+            raise
+
+    def _catch_up_store(self):
+        """Applies changes other processes committed to the database (write lock held)."""
+        version = self._store.data_version()
+        if version == self._store_version:
+            return
+        entries, last = self._store.changes_since(self._store_seq)
+        with self._lock:
+            if entries is None:
+                # Too far behind the change log, or the tables were re-imported
+                self._load_locked()
+                return
+            self._replaying = True
+            try:
+                for table, key, fields in entries:
+                    self._set_fields_locked(table, key, fields)
+            finally:
+                self._replaying = False
+            self._store_seq = last
+        self._store_version = version
+
+    def _changed_elsewhere(self):
+        # Another process wrote since we last caught up (shared journal or SQLite)
+        if self._store is not None:
+            return self._store.data_version() != self._store_version
+        return self._file_lock is not None and self._journal_changed()
+
+    def _journal_changed(self):
+        return self._journal.replaced() or self._journal.size() != self._journal_pos
+
+    def _catch_up(self):
+        """Applies journal entries appended by other workers (shared mode, write lock held)."""
+        if self._journal.replaced():
+            # Another worker compacted; its CSV snapshots already hold everything we had
+            self._journal.reopen()
+            with self._lock:
+                self._load_locked()
+            return
+        if self._journal.size() == self._journal_pos:
+            return
+        entries, end = self._journal.read_from(self._journal_pos)
+        with self._lock:
+            self._replaying = True
+            try:
+                for table, key, fields in entries:
+                    self._set_fields_locked(table, key, fields)
+            finally:
+                self._replaying = False
+            self._journal_pos = end
+
+    @contextmanager
+    def read(self):
+        """
+        Shared section for multi-step reads (a conflict check, a match scan):
+        mutations wait until it ends, other readers don't. In shared mode the
+        other workers' journal entries (or SQLite commits) are applied first.
+        """
+        if not self._rw.owned() and self._changed_elsewhere():
+            with self._exclusive():
+                pass
+        with self._rw.read():
+            yield self
+
+    @contextmanager
+    def transaction(self):
+        """
+        Exclusive section for check-then-write sequences such as check_conflicts
+        followed by an assignment: no other thread (or, in shared mode, worker)
+        reads or writes in between. Saves are batched until the block exits.
+        """
+        with self._exclusive(), self.batch():
+            yield self
+
+    def _set_fields_locked(self, table, key, fields):
+        pos = self._index[table].get(key)
+        if pos is None: return False
+        self.version += 1
+        positions = self._duplicates[table].get(key, [pos])
+        if self._journal is not None and not self._replaying:
+            self._journal.append(table, key, fields)
+            if self._file_lock is not None:
+                self._journal_pos = self._journal.size()
+        if self._store is not None and not self._replaying:
+            # Indexed UPDATE inside the current transaction, committed by _exclusive()
+            self._store_seq = self._store.update(table, KEY_COLUMNS[table], key, fields)
+        df = getattr(self, table)
+        typed = getattr(self, "typed_" + table)
+        for col, value in fields.items():
+            col_pos = df.columns.get_loc(col)
+            typed_value = models.parse_value(table, col, value)
+            if isinstance(typed[col].dtype, pd.CategoricalDtype) and typed_value not in typed[col].cat.categories:
+                typed[col] = typed[col].cat.add_categories([typed_value])
+            for pos in positions:
+                self.filters[table].update(pos, col, df.iat[pos, col_pos], value)
+                df.iat[pos, col_pos] = value
+                typed.iat[pos, col_pos] = typed_value
+                self._dirty[table].add((pos, col))
+        self._records[table].pop(key, None)
+        self._typed_records[table].pop(key, None)
+        if any(col in models.SET_COLUMNS[table] for col in fields):
+            self.list_edits[table].extend(positions)
+
+        # Keep the schedule indexes in step with the row
+        if "current_assignment" in fields and table in self.bookings:
+            for project_id in self.bookings[table].values(key):
+                self.bookings[table].remove(key, project_id)
+            self._add_booking(table, key, fields["current_assignment"])
+        if "maintenance_due" in fields and table == "drones":
+            due = models.parse_date(fields["maintenance_due"])
+            if pd.isna(due):
+                self.maintenance.discard(key)
+            else:
+                self.maintenance.set(key, due)
+        return True
 
     def _load_csv(self, filename, required_cols):
         try:
@@ -99,69 +597,245 @@ class DataManager:
         except Exception:
             return pd.DataFrame(columns=required_cols, dtype=str)
 
-    def _save_to_sheet(self, tab_name, df):
-        if not self.use_sheets: return
+    def _save_to_sheet(self, table):
+        tab_name = SHEET_TABS[table]
+        # Snapshot what to send under the lock, talk to Sheets outside it
+        with self._lock:
+            df = getattr(self, table)
+            header = df.columns.values.tolist()
+            full_rewrite = self._sheet_shapes.get(tab_name) != (header, len(df))
+            dirty = self._dirty[table]
+            if full_rewrite:
+                payload = [header] + df.values.tolist()
+            elif dirty:
+                payload = self._dirty_ranges(df, dirty)
+            else:
+                return
+            self._dirty[table] = set()
+            # In flight until the write lands, so refresh_from_sheets leaves the tab alone
+            self._sheet_writes[table] += 1
+            self._sheet_saving[table] += 1
+
         try:
-            worksheet = self.sheet.worksheet(tab_name)
-            worksheet.clear()
-            # method update requires [list of headers] + [list of rows]
-            worksheet.update([df.columns.values.tolist()] + df.values.tolist())
-        except Exception as e:
-            print(f"Error saving to {tab_name}: {e}")
+            worksheet = self._worksheet(tab_name)
+            if full_rewrite:
+                # Schema or row count changed: rewrite the whole tab
+                worksheet.clear()
+                # method update requires [list of headers] + [list of rows]
+                worksheet.update(payload)
+                self._sheet_shapes[tab_name] = (header, len(df))
+            else:
+                worksheet.batch_update(payload)
+        except Exception:
+            # Keep the cells dirty so the next save retries them
+            with self._lock:
+                self._dirty[table] |= dirty
+            raise
+        finally:
+            with self._lock:
+                self._sheet_saving[table] -= 1
+
+    def _dirty_ranges(self, df, dirty):
+        # One A1 range per run of adjacent changed cells in a row (row 1 is the header)
+        cols_by_row = {}
+        for pos, col in dirty:
+            cols_by_row.setdefault(pos, set()).add(df.columns.get_loc(col))
+        data = []
+        for pos in sorted(cols_by_row):
+            cols = sorted(cols_by_row[pos])
+            run = [cols[0]]
+            for col_pos in cols[1:] + [None]:
+                if col_pos is not None and col_pos == run[-1] + 1:
+                    run.append(col_pos)
+                    continue
+                start = rowcol_to_a1(pos + 2, run[0] + 1)
+                end = rowcol_to_a1(pos + 2, run[-1] + 1)
+                data.append({
+                    "range": start if start == end else f"{start}:{end}",
+                    "values": [[df.iat[pos, c] for c in run]],
+                })
+                run = [col_pos]
+        return data
 
     def save_pilots(self):
-        if self.use_sheets:
-            self._save_to_sheet("Pilots", self.pilots)
-        else:
-            self.pilots.to_csv(self.pilot_file, index=False)
+        self._save("pilots")
 
     def save_drones(self):
-        if self.use_sheets:
-            self._save_to_sheet("Drones", self.drones)
+        self._save("drones")
+
+    def _save(self, table):
+        if self._store is not None:
+            return # the row UPDATE was the write, committed with its transaction
+        with self._lock:
+            if self._batch_depth:
+                self._batched.add(table)
+                return
+        if self._journal is not None:
+            # The journal entry is the durable write; compaction is amortised
+            if self._journal.entries < self.compact_every:
+                return
+            if self._writer is not None:
+                self._writer.schedule(table)
+            else:
+                self.compact()
+        elif self._writer is not None:
+            # Write-behind: persisted later by the background flusher
+            self._writer.schedule(table)
+        elif self.use_sheets:
+            try:
+                self._save_to_sheet(table)
+            except Exception as e:
+                print(f"Error saving to {SHEET_TABS[table]}: {e}")
+        else:
+            self._save_to_csv(table)
+
+    @contextmanager
+    def batch(self):
+        """
+        Groups mutations: saves requested inside the block are deferred until the
+        outermost batch exits, then each touched table is saved once.
+        """
+        with self._lock:
+            self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._batch_depth -= 1
+                tables = [] if self._batch_depth else sorted(self._batched)
+                if not self._batch_depth:
+                    self._batched = set()
+            for table in tables:
+                self._save(table)
+
+    def _persist(self, table):
+        if self._journal is not None:
+            self.compact()
+        elif self.use_sheets:
+            self._save_to_sheet(table)
         else:
-            self.drones.to_csv(self.drone_file, index=False)
+            self._save_to_csv(table)
+
+    def _save_to_csv(self, table):
+        with self._lock:
+            df = getattr(self, table).copy()
+        atomic_write_csv(df, self._csv_files[table])
+
+    def compact(self):
+        """Folds the journal into fresh CSV snapshots and truncates it."""
+        if self._journal is None: return
+        # Shared mode: other workers must not append between the snapshot and the truncation
+        with self._exclusive() if self._file_lock is not None else nullcontext():
+            self._compact()
+
+    def _compact(self):
+        with self._lock:
+            if not self._journal.entries: return
+            offset = self._journal.size()
+            frames = {table: getattr(self, table).copy() for table in KEY_COLUMNS}
+        for table, df in frames.items():
+            atomic_write_csv(df, self._csv_files[table])
+        # Entries appended while the snapshots were written stay in the journal
+        with self._lock:
+            self._journal.drop_before(offset)
+            self._journal_pos = self._journal.size()
+
+    def flush(self, timeout=None):
+        """Blocks until queued write-behind saves are on disk / in Sheets."""
+        if self._writer is not None:
+            return self._writer.flush(timeout)
+        return True
+
+    sync = flush
+
+    def close(self, timeout=10):
+        """Flushes pending writes and stops the write-behind thread and Sheets poller."""
+        if self._refresher is not None:
+            self._refresher.stop(timeout)
+            self._refresher = None
+        if self._writer is not None:
+            self._writer.close(timeout)
+            self._writer = None
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+        if self._store is not None:
+            self._store.close()
+            self._store = None
 
     def get_pilot(self, pilot_id):
-        df = self.pilots[self.pilots['pilot_id'] == pilot_id]
-        if df.empty: return None
-        return df.iloc[0].to_dict()
+        return self._get_record("pilots", pilot_id)
 
     def get_drone(self, drone_id):
-        df = self.drones[self.drones['drone_id'] == drone_id]
-        if df.empty: return None
-        return df.iloc[0].to_dict()
+        return self._get_record("drones", drone_id)
 
     def get_mission(self, project_id):
-        df = self.missions[self.missions['project_id'] == project_id]
-        if df.empty: return None
-        return df.iloc[0].to_dict()
+        return self._get_record("missions", project_id)
+
+    def data_tag(self):
+        """
+        Opaque token that changes whenever the data does (the basis of api.py's ETags).
+        With a store other processes share (SQLite, or the journal in shared mode) it is
+        the store's position, so every worker gives the same tag for the same data.
+        """
+        if self._store is not None:
+            return f"db-{self._store_seq}"
+        if self._journal is not None and self._file_lock is not None:
+            return f"journal-{self._journal.position(self._journal_pos)}"
+        return f"{self._instance_id}-{self.version}"
+
+    def position_of(self, table, key, hint=None):
+        """Row position of `key` in `table`: `hint` if that row still holds the key, else the first row with it."""
+        frame = getattr(self, table)
+        if hint is not None and 0 <= hint < len(frame) and frame[KEY_COLUMNS[table]].iat[hint] == key:
+            return hint
+        return self._index[table].get(key)
+
+    # Typed records: same rows with real datetimes, skill sets and categories (see models.py)
+    def get_typed_pilot(self, pilot_id):
+        return self._get_record("pilots", pilot_id, typed=True)
+
+    def get_typed_drone(self, drone_id):
+        return self._get_record("drones", drone_id, typed=True)
+
+    def get_typed_mission(self, project_id):
+        return self._get_record("missions", project_id, typed=True)
+        
+    def bookings_overlapping(self, table, key, start, end):
+        """(start, end, project_id) bookings of a pilot or drone that overlap [start, end]."""
+        return self.bookings[table].overlapping(key, start, end)
+
+    def drones_due_between(self, start, end):
+        """drone_ids whose maintenance_due falls inside [start, end]."""
+        return self.maintenance.range(start, end)
         
     def update_pilot_status(self, pilot_id, new_status):
-        if pilot_id in self.pilots['pilot_id'].values:
-            self.pilots.loc[self.pilots['pilot_id'] == pilot_id, 'status'] = new_status
+        if self._set_fields("pilots", pilot_id, {"status": new_status}):
             self.save_pilots()
             return True
         return False
     
     def update_drone_status(self, drone_id, new_status):
-        if drone_id in self.drones['drone_id'].values:
-            self.drones.loc[self.drones['drone_id'] == drone_id, 'status'] = new_status
+        if self._set_fields("drones", drone_id, {"status": new_status}):
             self.save_drones()
             return True
         return False
 
+    def update_record(self, table, key, fields):
+        """Sets several raw (string) fields of one pilot/drone/mission row and saves."""
+        if self._set_fields(table, key, fields):
+            self._save(table)
+            return True
+        return False
+
     def assign_pilot_to_mission(self, pilot_id, project_id):
-        if pilot_id in self.pilots['pilot_id'].values:
-            self.pilots.loc[self.pilots['pilot_id'] == pilot_id, 'current_assignment'] = project_id
-            self.pilots.loc[self.pilots['pilot_id'] == pilot_id, 'status'] = 'Assigned'
+        if self._set_fields("pilots", pilot_id, {"current_assignment": project_id, "status": "Assigned"}):
             self.save_pilots()
             return True
         return False
 
     def assign_drone_to_mission(self, drone_id, project_id):
-        if drone_id in self.drones['drone_id'].values:
-            self.drones.loc[self.drones['drone_id'] == drone_id, 'current_assignment'] = project_id
-            self.drones.loc[self.drones['drone_id'] == drone_id, 'status'] = 'Assigned'
+        if self._set_fields("drones", drone_id, {"current_assignment": project_id, "status": "Assigned"}):
             self.save_drones()
             return True
         return False
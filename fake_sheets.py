@@ -0,0 +1,122 @@
+"""
+In-memory stand-ins for gspread's Spreadsheet / Worksheet, so DataManager's
+Sheets mode can be exercised offline:
+
+    sheet = FakeSpreadsheet.from_csvs({"Pilots": "pilot_roster.csv", ...})
+    dm = DataManager(sheet=sheet)
+
+Only the calls DataManager makes are implemented. Each worksheet counts its
+calls in `calls` so callers can see how many requests a real sheet would get.
+"""
+import datetime
+import gspread
+import pandas as pd
+from gspread.utils import a1_range_to_grid_range
+
+
+class FakeWorksheet:
+    def __init__(self, title, values=None, spreadsheet=None):
+        self.title = title
+        self.values = [list(row) for row in (values or [])]
+        self.spreadsheet = spreadsheet
+        self.calls = {"get_all_records": 0, "get_all_values": 0, "clear": 0, "update": 0, "batch_update": 0}
+
+    def _touch(self, call):
+        self.calls[call] += 1
+        if self.spreadsheet is not None and call in ("clear", "update", "batch_update"):
+            self.spreadsheet.touch()
+
+    def get_all_values(self):
+        self._touch("get_all_values")
+        return [list(row) for row in self.values]
+
+    def get_all_records(self):
+        self._touch("get_all_records")
+        if not self.values:
+            return []
+        header = self.values[0]
+        return [dict(zip(header, row + [""] * (len(header) - len(row)))) for row in self.values[1:]]
+
+    def clear(self):
+        self._touch("clear")
+        self.values = []
+
+    def _write(self, range_name, values):
+        grid = a1_range_to_grid_range(range_name)
+        top, left = grid.get("startRowIndex", 0), grid.get("startColumnIndex", 0)
+        for r, row in enumerate(values):
+            while len(self.values) <= top + r:
+                self.values.append([])
+            target = self.values[top + r]
+            for c, value in enumerate(row):
+                while len(target) <= left + c:
+                    target.append("")
+                target[left + c] = value
+
+    def update(self, values, range_name=None, **kwargs):
+        self._touch("update")
+        self._write(range_name or "A1", values)
+
+    def batch_update(self, data, **kwargs):
+        self._touch("batch_update")
+        for item in data:
+            self._write(item["range"], item["values"])
+
+
+class FakeSpreadsheet:
+    def __init__(self, tabs=None):
+        self.id = "fake-sheet"
+        self.title = "AeroAgent (offline)"
+        self.lastUpdateTime = _now()
+        self.calls = {"values_batch_get": 0}
+        self._worksheets = {}
+        for title, values in (tabs or {}).items():
+            self.add_worksheet(title, values)
+
+    @classmethod
+    def from_csvs(cls, csvs):
+        """csvs: dict of {tab title: csv path}"""
+        tabs = {}
+        for title, path in csvs.items():
+            df = pd.read_csv(path, dtype=str).fillna("")
+            tabs[title] = [df.columns.tolist()] + df.values.tolist()
+        return cls(tabs)
+
+    def add_worksheet(self, title, values=None, **kwargs):
+        self._worksheets[title] = FakeWorksheet(title, values, spreadsheet=self)
+        return self._worksheets[title]
+
+    def worksheet(self, title):
+        if title not in self._worksheets:
+            raise gspread.WorksheetNotFound(title)
+        return self._worksheets[title]
+
+    def worksheets(self):
+        return list(self._worksheets.values())
+
+    def values_batch_get(self, ranges, **kwargs):
+        """Whole-tab ranges only ("'Pilots'" or "Pilots"), like DataManager requests them."""
+        self.calls["values_batch_get"] += 1
+        value_ranges = []
+        for name in ranges:
+            title = name.strip("'")
+            values = self.worksheet(title).values
+            # The API trims trailing empty cells, so rows come back ragged
+            trimmed = []
+            for row in values:
+                row = list(row)
+                while row and row[-1] == "":
+                    row.pop()
+                trimmed.append(row)
+            value_ranges.append({"range": name, "majorDimension": "ROWS", "values": trimmed})
+        return {"spreadsheetId": self.id, "valueRanges": value_ranges}
+
+    def get_lastUpdateTime(self):
+        return self.lastUpdateTime
+
+    def touch(self):
+        self.lastUpdateTime = _now()
+
+
+def _now():
+    return datetime.datetime.now(datetime.timezone.utc).isoformat()
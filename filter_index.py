@@ -0,0 +1,74 @@
+import numpy as np
+import models
+
+
+class FilterIndex:
+    """
+    Lookup structures for one table, used by Logic.filter_positions.
+
+    Token columns (comma-separated lists such as skills) map every lower-cased
+    item to the set of row positions holding it, so "mapping" finds rows
+    listing "Mapping" but not "3D Mapping". Hash columns (location, status)
+    map the lower-cased cell value the same way. Row positions are those of
+    the DataFrame the index was built from; update() keeps it in step with
+    in-place edits.
+    """
+    def __init__(self, df, token_columns=(), hash_columns=()):
+        self.n_rows = len(df)
+        self.token_columns = set(token_columns)
+        self._postings = {} # column -> token -> set of row positions
+        for col in list(token_columns) + list(hash_columns):
+            postings = {}
+            for pos, value in enumerate(df[col].tolist()):
+                for token in self.tokens(col, value):
+                    postings.setdefault(token, set()).add(pos)
+            self._postings[col] = postings
+
+    def indexed(self, column):
+        return column in self._postings
+
+    def tokens(self, column, value):
+        if column in self.token_columns:
+            return set(models.split_list(value))
+        return {str(value).lower()}
+
+    def lookup(self, column, value):
+        """Row positions whose `column` holds every token of `value` (a set; don't mutate it)."""
+        postings = self._postings[column]
+        tokens = self.tokens(column, value)
+        if not tokens:
+            return set(range(self.n_rows))
+        sets = sorted((postings.get(token, set()) for token in tokens), key=len)
+        if len(sets) == 1:
+            return sets[0]
+        return sets[0].intersection(*sets[1:])
+
+    def update(self, pos, column, old, new):
+        if column not in self._postings:
+            return
+        postings = self._postings[column]
+        for token in self.tokens(column, old):
+            rows = postings.get(token)
+            if rows is not None:
+                rows.discard(pos)
+                if not rows:
+                    del postings[token]
+        for token in self.tokens(column, new):
+            postings.setdefault(token, set()).add(pos)
+
+    def select(self, filters):
+        """
+        Positions (sorted array) matching every indexed filter, smallest
+        posting set first, plus the {column: value} filters it couldn't answer.
+        """
+        sets, rest = [], {}
+        for column, value in filters.items():
+            if self.indexed(column):
+                sets.append(self.lookup(column, value))
+            else:
+                rest[column] = value
+        if not sets:
+            return np.arange(self.n_rows), rest
+        sets.sort(key=len)
+        rows = sets[0].intersection(*sets[1:]) if len(sets) > 1 else sets[0]
+        return np.fromiter(sorted(rows), dtype=np.int64, count=len(rows)), rest
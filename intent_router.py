@@ -0,0 +1,165 @@
+import re
+import threading
+from collections import Counter
+
+HIGH = 0.95 # the whole message is the command, e.g. "assign P001 to PRJ001"
+LOW = 0.5   # a keyword or pattern somewhere in a longer message
+
+
+class Route:
+    """
+    One intent. `exact` must match the whole normalised message (high
+    confidence); `loose` may match anywhere (low confidence, the old regex
+    fallback). `build(match, text)` turns the match into a tool call.
+    """
+    def __init__(self, name, build, exact=None, loose=None, confidence=HIGH, max_length=None):
+        self.name = name
+        self.build = build
+        # Politeness doesn't change the intent
+        self.exact = re.compile(rf"(?:please )?(?:{exact})(?: please)?") if exact else None
+        self.loose = re.compile(loose) if loose else None
+        self.confidence = confidence
+        self.max_length = max_length
+
+
+class RouteMatch:
+    def __init__(self, route, tool_call, confidence):
+        self.route = route
+        self.tool_call = tool_call
+        self.confidence = confidence
+
+
+def _upper(match, group):
+    return match.group(group).upper()
+
+
+def _force(text):
+    return "override" in text
+
+
+BATCH_ITEM = re.compile(r"([pd]\d+) to (prj\d+)")
+
+
+def _assign_batch(match, text):
+    calls = []
+    for resource_id, project_id in BATCH_ITEM.findall(text):
+        tool = "assign_pilot" if resource_id.startswith("p") else "assign_drone"
+        key = "pilot_id" if tool == "assign_pilot" else "drone_id"
+        calls.append({"tool": tool, key: resource_id.upper(), "project_id": project_id.upper(), "force": _force(text)})
+    return {"tool": "batch", "calls": calls}
+
+
+def _drone_filters(match, text):
+    filters = {}
+    if "available" in text: filters["status"] = "Available"
+    if "maintenance" in text: filters["status"] = "Maintenance"
+    return {"tool": "query_drones", "filters": filters}
+
+
+def _pilot_filters(match, text):
+    filters = {}
+    if "available" in text: filters["status"] = "Available"
+    return {"tool": "query_pilots", "filters": filters}
+
+
+# Order matters: the first route that matches wins (exact matches are tried before loose ones)
+ROUTES = [
+    Route("greeting", lambda m, t: {"tool": "general_chat", "reply": "Hello! AeroAgent online. How can I help?"},
+          loose=r"\b(hello|hi|hey|greetings)\b", confidence=1.0, max_length=19),
+    # "assign P001 to PRJ001, P002 to PRJ002 and D003 to PRJ001"
+    Route("assign_batch", _assign_batch,
+          exact=r"(?:override and |force )?assign [pd]\d+ to prj\d+(?:(?:,|;| and|, and) (?:assign )?[pd]\d+ to prj\d+)+(?:,? (?:with )?override)?",
+          loose=r"assign [pd]\d+ to prj\d+.*[,;].*[pd]\d+ to prj\d+"),
+    Route("assign_pilot",
+          lambda m, t: {"tool": "assign_pilot", "pilot_id": _upper(m, 1), "project_id": _upper(m, 2), "force": _force(t)},
+          exact=r"(?:override and |force )?assign (p\d+) to (prj\d+)(?:,? (?:with )?override)?",
+          loose=r"assign (p\d+) to (prj\d+)"),
+    Route("assign_drone",
+          lambda m, t: {"tool": "assign_drone", "drone_id": _upper(m, 1), "project_id": _upper(m, 2), "force": _force(t)},
+          exact=r"(?:override and |force )?assign (d\d+) to (prj\d+)(?:,? (?:with )?override)?",
+          loose=r"assign (d\d+) to (prj\d+)"),
+    Route("check_conflicts", lambda m, t: {"tool": "check_conflicts", "project_id": _upper(m, 1)},
+          exact=r"check conflicts? (?:for|on) (prj\d+)",
+          loose=r"check conflicts for (prj\d+)"),
+    Route("scan_conflicts", lambda m, t: {"tool": "scan_conflicts"},
+          exact=r"(?:scan|check)(?: all)? (?:conflicts|assignments)(?: for conflicts)?|scan for conflicts",
+          loose=r"conflict.*(?:scan|all)|(?:scan|all).*conflict"),
+    Route("suggest_reassignment", lambda m, t: {"tool": "suggest_reassignment", "project_id": _upper(m, 1), "urgent": True},
+          exact=r"urgent(?: reassignment)?(?: for)? (prj\d+)",
+          loose=r"urgent.*(prj\d+)"),
+    Route("plan_assignments", lambda m, t: {"tool": "plan_assignments", "force": _force(t)},
+          exact=r"(?:override and )?(?:plan|optimi[sz]e|auto[- ]?assign)(?: all)?(?: the)?(?: open)? (?:assignments|missions|staffing)",
+          loose=r"\bplan\b.*\b(?:assignments|missions|staffing)\b|\bauto[- ]?assign"),
+    Route("find_matches", lambda m, t: {"tool": "find_matches", "project_id": _upper(m, 1)},
+          exact=r"(?:find |show )?(?:matches|candidates|pilots) for (prj\d+)"),
+    Route("query_drones", _drone_filters,
+          exact=r"(?:show|list|get)(?: me)?(?: all)?(?: the)?(?: available| maintenance)? drones(?: in maintenance| available)?",
+          loose=r"drone"),
+    Route("query_missions", lambda m, t: {"tool": "query_missions", "filters": {}},
+          exact=r"(?:show|list|get)(?: me)?(?: all)?(?: the)? (?:missions|projects)",
+          loose=r"mission|project"),
+    Route("query_pilots", _pilot_filters,
+          exact=r"(?:show|list|get|who are)(?: me)?(?: all)?(?: the)?(?: available)? pilots",
+          loose=r"available|show|list|who|give|all|pilot"),
+]
+
+
+class IntentRouter:
+    """
+    Precompiled, ordered regex routes tried before the LLM. match() returns
+    the best RouteMatch (or None); callers only trust it when `confident`.
+    hits counts confident matches per route, i.e. LLM calls avoided.
+    """
+    def __init__(self, routes=None, threshold=0.9):
+        self.routes = routes or ROUTES
+        self.threshold = threshold
+        self.hits = Counter()
+        self.deferred = 0 # messages left to the LLM / loose fallback
+        self._lock = threading.Lock()
+
+    def normalise(self, text):
+        return " ".join(text.lower().split()).rstrip(".!?")
+
+    def match(self, text):
+        clean = self.normalise(text)
+        found = self._exact(clean) or self._loose(clean)
+        with self._lock:
+            if found is not None and self.confident(found):
+                self.hits[found.route] += 1
+            else:
+                self.deferred += 1
+        return found
+
+    def confident(self, found):
+        return found is not None and found.confidence >= self.threshold
+
+    def _exact(self, clean):
+        for route in self.routes:
+            if route.max_length is not None and len(clean) > route.max_length:
+                continue
+            m = route.exact.fullmatch(clean) if route.exact else None
+            if m:
+                return RouteMatch(route.name, route.build(m, clean), route.confidence)
+        return None
+
+    def _loose(self, clean):
+        for route in self.routes:
+            if route.max_length is not None and len(clean) > route.max_length:
+                continue
+            m = route.loose.search(clean) if route.loose else None
+            if m:
+                # Unanchored greeting stays confident, other loose matches need the LLM's opinion
+                confidence = route.confidence if route.max_length is not None else LOW
+                return RouteMatch(route.name, route.build(m, clean), confidence)
+        return None
+
+    def stats(self):
+        with self._lock:
+            handled = sum(self.hits.values())
+            total = handled + self.deferred
+            return {
+                "routes": dict(self.hits),
+                "llm_calls_avoided": handled,
+                "deferred": self.deferred,
+                "handled_rate": handled / total if total else 0.0,
+            }
@@ -0,0 +1,80 @@
+from bisect import bisect_left, bisect_right, insort
+
+
+class IntervalIndex:
+    """
+    Closed [start, end] intervals grouped by key (e.g. pilot_id -> bookings).
+    Each key keeps its intervals sorted by start together with its longest
+    interval, so an overlap query only scans starts in [start - longest, end]:
+    O(log n + k) for rosters where bookings have similar lengths.
+    """
+    def __init__(self, items=()):
+        self._entries = {} # key -> sorted list of (start, end, value)
+        self._longest = {} # key -> longest end - start, computed on first query
+        # Bulk load: append everything, sort each key once
+        for key, start, end, value in items:
+            self._entries.setdefault(key, []).append((start, end, value))
+        for entries in self._entries.values():
+            entries.sort()
+
+    def add(self, key, start, end, value):
+        insort(self._entries.setdefault(key, []), (start, end, value))
+        self._longest.pop(key, None)
+
+    def remove(self, key, value):
+        entries = self._entries.get(key, [])
+        entries[:] = [e for e in entries if e[2] != value]
+        if not entries:
+            self._entries.pop(key, None)
+        self._longest.pop(key, None)
+
+    def overlapping(self, key, start, end):
+        """Returns (start, end, value) for every interval of `key` overlapping [start, end]."""
+        entries = self._entries.get(key)
+        if not entries:
+            return []
+        if key not in self._longest:
+            self._longest[key] = max(e[1] - e[0] for e in entries)
+        lo = bisect_left(entries, (start - self._longest[key],))
+        hi = bisect_right(entries, (end, _MAX))
+        return [e for e in entries[lo:hi] if e[1] >= start]
+
+    def values(self, key):
+        return [e[2] for e in self._entries.get(key, [])]
+
+
+class PointIndex:
+    """
+    Sorted (date, key) points, e.g. drone maintenance_due dates.
+    range() answers "which keys fall inside [start, end]" in O(log n + k).
+    """
+    def __init__(self, items=()):
+        self._by_key = dict(items)
+        self._points = sorted((point, key) for key, point in self._by_key.items())
+
+    def set(self, key, point):
+        self.discard(key)
+        self._by_key[key] = point
+        insort(self._points, (point, key))
+
+    def discard(self, key):
+        point = self._by_key.pop(key, None)
+        if point is not None:
+            pos = bisect_left(self._points, (point, key))
+            if pos < len(self._points) and self._points[pos] == (point, key):
+                del self._points[pos]
+
+    def range(self, start, end):
+        lo = bisect_left(self._points, (start,))
+        hi = bisect_right(self._points, (end, _MAX))
+        return [key for _, key in self._points[lo:hi]]
+
+
+class _Max:
+    # Sorts after any key/value so (x, _MAX) bounds every tuple starting with x
+    def __lt__(self, other): return False
+    def __gt__(self, other): return True
+    def __eq__(self, other): return isinstance(other, _Max)
+    def __hash__(self): return 0
+
+_MAX = _Max()
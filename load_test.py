@@ -0,0 +1,129 @@
+"""
+Load test for api.py. Run it against a throwaway copy of the data, because the
+race phase really assigns drones:
+
+    uvicorn api:app --port 8000                        # one worker
+    AEROAGENT_WORKERS=4 python api.py                  # four workers, shared journal
+    python load_test.py --url http://127.0.0.1:8000 --concurrency 16 --seconds 10
+
+1. Race: every available drone is sent to two missions with overlapping dates
+   at the same moment. At most one of each pair may succeed; anything else is
+   a double booking.
+2. Throughput: a read-heavy mix (conflict checks, matches, drone queries) from
+   `concurrency` keep-alive clients; reports req/s and latency percentiles.
+
+What the locking buys is correctness: 0 double bookings in the race phase, with
+one worker or several. Extra workers only raise req/s given spare cores. On a
+1-CPU machine (big fixture, concurrency 16, 10s) the results were:
+    1 worker, csv         339 req/s   p50 44 ms
+    4 workers, journal    189 req/s   p50 76 ms
+    4 workers, sqlite     157 req/s   p50 94 ms
+"""
+import argparse
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+import requests
+
+_local = threading.local()
+
+
+def session():
+    if not hasattr(_local, "session"):
+        _local.session = requests.Session()
+    return _local.session
+
+
+def overlapping_pairs(missions):
+    missions = missions.assign(
+        start=pd.to_datetime(missions["start_date"], errors="coerce"),
+        end=pd.to_datetime(missions["end_date"], errors="coerce"),
+    ).dropna(subset=["start", "end"]).drop_duplicates("project_id")
+    rows = missions.sort_values("start").to_dict("records")
+    pairs = []
+    for i, a in enumerate(rows):
+        for b in rows[i + 1:]:
+            if b["start"] > a["end"]:
+                break
+            pairs.append((a["project_id"], b["project_id"]))
+    return pairs
+
+
+def race(url, concurrency):
+    drones = pd.DataFrame(session().post(f"{url}/drones/query", json={"filters": {"status": "Available"}}).json())
+    missions = pd.DataFrame(session().post(f"{url}/missions/query", json={"filters": {}}).json())
+    pairs = overlapping_pairs(missions)
+    if drones.empty or not pairs:
+        print("Race: no available drones or overlapping missions, skipped.")
+        return
+    jobs = []
+    for drone_id in drones["drone_id"]:
+        a, b = random.choice(pairs)
+        jobs += [(drone_id, a), (drone_id, b)]
+    random.shuffle(jobs)
+
+    def assign(job):
+        drone_id, project_id = job
+        resp = session().post(f"{url}/assign", json={
+            "project_id": project_id, "resource_id": drone_id, "resource_type": "drone",
+            "confirm": True, "override_soft_conflicts": True,
+        })
+        return drone_id, resp.json().get("success", False)
+
+    with ThreadPoolExecutor(concurrency) as pool:
+        results = list(pool.map(assign, jobs))
+    wins = {}
+    for drone_id, success in results:
+        wins[drone_id] = wins.get(drone_id, 0) + int(success)
+    double = sum(1 for n in wins.values() if n > 1)
+    print(f"Race: {len(jobs)} assigns for {len(wins)} drones, {sum(wins.values())} succeeded, "
+          f"{double} double bookings {'(OK)' if not double else '(BROKEN)'}")
+
+
+def throughput(url, concurrency, seconds):
+    pilots = [p["pilot_id"] for p in session().get(f"{url}/pilots/available", params={"status": "all"}).json()]
+    projects = [m["project_id"] for m in session().post(f"{url}/missions/query", json={"filters": {}}).json()]
+    deadline = time.monotonic() + seconds
+    latencies = []
+    lock = threading.Lock()
+
+    def worker():
+        mine = []
+        while time.monotonic() < deadline:
+            roll = random.random()
+            start = time.perf_counter()
+            if roll < 0.6:
+                session().post(f"{url}/conflicts/check", json={"project_id": random.choice(projects), "pilot_id": random.choice(pilots)}).raise_for_status()
+            elif roll < 0.8:
+                session().get(f"{url}/project/{random.choice(projects)}/matches").raise_for_status()
+            else:
+                session().post(f"{url}/drones/query", json={"filters": {"status": "Available"}}).raise_for_status()
+            mine.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(mine)
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    began = time.monotonic()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.monotonic() - began
+    latencies.sort()
+    pct = lambda q: latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000
+    print(f"Throughput: {len(latencies)} requests in {elapsed:.1f}s = {len(latencies) / elapsed:.0f} req/s "
+          f"(p50 {pct(0.5):.1f} ms, p95 {pct(0.95):.1f} ms, concurrency {concurrency})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="AeroAgent API load test")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--skip-race", action="store_true")
+    args = parser.parse_args()
+    if not args.skip_race:
+        race(args.url, args.concurrency)
+    throughput(args.url, args.concurrency, args.seconds)
@@ -1,16 +1,45 @@
 from datetime import datetime
+import functools
+import threading
+from collections import Counter
+import time
+import numpy as np
 import pandas as pd
-from dateutil import parser
+import models
+import planner
+import scoring
+
+
+def reads(method):
+    """Runs a Logic method under the DataManager's shared read lock."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.dm.read():
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+def transactional(method):
+    """Runs a Logic method as one DataManager transaction (check-then-write is atomic)."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.dm.transaction():
+            return method(self, *args, **kwargs)
+    return wrapper
 
 class Logic:
     def __init__(self, data_manager):
         self.dm = data_manager
+        # (table, column) -> (list generation, edits applied, MembershipMatrix)
+        self._bitmaps = {}
+        self._bitmaps_lock = threading.Lock()
+        self._priority_cache = None
+        self._priority_source = None
 
     def parse_skills(self, skills_str):
-        if pd.isna(skills_str) or str(skills_str).strip() == "":
-            return []
-        return [s.strip().lower() for s in str(skills_str).split(',')]
+        return models.split_list(skills_str)
 
+    @reads
     def check_conflicts(self, project_id, pilot_id=None, drone_id=None):
         """
         Returns a list of conflict dictionaries:
@@ -21,315 +50,705 @@ class Logic:
             "can_override": bool
         }
         """
-        conflicts = []
-        
-        # Get Mission Details
-        mission = self.dm.get_mission(project_id)
+        # Get Mission Details (typed: dates and requirement lists are pre-parsed)
+        mission = self.dm.get_typed_mission(project_id)
         if not mission:
             return [{"type": "DATA_ERROR", "severity": "HARD", "message": f"Mission {project_id} not found", "can_override": False}]
             
-        try:
-            mission_start = parser.parse(str(mission.get('start_date', '')))
-            mission_end = parser.parse(str(mission.get('end_date', '')))
-        except:
+        if pd.isna(mission['start_date']) or pd.isna(mission['end_date']):
              return [{"type": "DATA_ERROR", "severity": "HARD", "message": f"Invalid dates for Mission {project_id}", "can_override": False}]
 
+        conflicts = []
+
         # --- PILOT CHECKS ---
+        pilot = None
         if pilot_id:
-            pilot = self.dm.get_pilot(pilot_id)
+            pilot = self.dm.get_typed_pilot(pilot_id)
             if not pilot:
                  conflicts.append({"type": "DATA_ERROR", "severity": "HARD", "message": f"Pilot {pilot_id} not found", "can_override": False})
             else:
-                # 1. Status Check
-                if pilot['status'] == 'On Leave':
-                    conflicts.append({"type": "UNAVAILABLE", "severity": "HARD", "message": f"Pilot {pilot['name']} is On Leave.", "can_override": False})
-                elif pilot['status'] == 'Unavailable':
-                    conflicts.append({"type": "UNAVAILABLE", "severity": "HARD", "message": f"Pilot {pilot['name']} is Unavailable.", "can_override": False})
-
-                # 2. Double Booking
-                if pilot['current_assignment'] and pilot['current_assignment'] != '–' and pilot['current_assignment'] != project_id:
-                     other_proj = self.dm.get_mission(pilot['current_assignment'])
-                     if other_proj:
-                        try:
-                            other_start = parser.parse(str(other_proj['start_date']))
-                            other_end = parser.parse(str(other_proj['end_date']))
-                            if (mission_start <= other_end) and (mission_end >= other_start):
-                                conflicts.append({
-                                    "type": "DOUBLE_BOOKING", 
-                                    "severity": "HARD", 
-                                    "message": f"Pilot {pilot['name']} is assigned to {pilot['current_assignment']} during these dates.", 
-                                    "can_override": False
-                                })
-                        except:
-                            pass # Date error handled elsewhere
-
-                # 3. Certification (HARD)
-                req_certs = self.parse_skills(mission.get('required_certs', ''))
-                pilot_certs = self.parse_skills(pilot.get('certifications', ''))
-                missing_certs = [c for c in req_certs if c not in pilot_certs]
-                if missing_certs:
-                    conflicts.append({
-                        "type": "CERTIFICATION_MISSING", 
-                        "severity": "HARD", 
-                        "message": f"Pilot {pilot['name']} missing required certs: {', '.join(missing_certs)}", 
-                        "can_override": False
-                    })
-
-                # 4. Skills (SOFT - Explicit override required)
-                req_skills = self.parse_skills(mission.get('required_skills', ''))
-                pilot_skills = self.parse_skills(pilot.get('skills', ''))
-                missing_skills = [s for s in req_skills if s not in pilot_skills]
-                if missing_skills:
-                    conflicts.append({
-                        "type": "SKILL_MISMATCH", 
-                        "severity": "SOFT", 
-                        "message": f"Pilot {pilot['name']} missing preferred skills: {', '.join(missing_skills)}", 
-                        "can_override": True
-                    })
-
-                # 5. Location (SOFT)
-                if pilot['location'] != mission['location']:
-                     conflicts.append({
-                        "type": "LOCATION_MISMATCH", 
-                        "severity": "SOFT", 
-                        "message": f"Pilot {pilot['name']} is in {pilot['location']}, mission is in {mission['location']}.", 
-                        "can_override": True
-                    })
+                conflicts.extend(self._pilot_conflicts(project_id, mission, pilot))
 
         # --- DRONE CHECKS ---
         if drone_id:
-            drone = self.dm.get_drone(drone_id)
+            drone = self.dm.get_typed_drone(drone_id)
             if not drone:
                 conflicts.append({"type": "DATA_ERROR", "severity": "HARD", "message": f"Drone {drone_id} not found", "can_override": False})
             else:
-                # 1. Maintenance (HARD)
-                if drone['status'] == 'Maintenance':
-                    conflicts.append({"type": "MAINTENANCE", "severity": "HARD", "message": f"Drone {drone['model']} is in Maintenance.", "can_override": False})
-                
-                # Check Maintenance Due Date
-                try:
-                    maint_date = parser.parse(str(drone['maintenance_due']))
-                    if maint_date < mission_end:
-                        conflicts.append({"type": "MAINTENANCE_DUE", "severity": "HARD", "message": f"Drone {drone['model']} maintenance due ({drone['maintenance_due']}) before mission ends.", "can_override": False})
-                except:
-                    pass
-
-                # 2. Double Booking (HARD)
-                if drone['current_assignment'] and drone['current_assignment'] != '–' and drone['current_assignment'] != project_id:
-                     other_proj = self.dm.get_mission(drone['current_assignment'])
-                     if other_proj:
-                        try:
-                            other_start = parser.parse(str(other_proj['start_date']))
-                            other_end = parser.parse(str(other_proj['end_date']))
-                            if (mission_start <= other_end) and (mission_end >= other_start):
-                                conflicts.append({
-                                    "type": "DOUBLE_BOOKING", 
-                                    "severity": "HARD", 
-                                    "message": f"Drone {drone['model']} is assigned to {drone['current_assignment']}.", 
-                                    "can_override": False
-                                })
-                        except: pass
-
-                # 3. Location (SOFT)
-                if drone['location'] != mission['location']:
-                    conflicts.append({
-                        "type": "LOCATION_MISMATCH", 
-                        "severity": "SOFT", 
-                        "message": f"Drone {drone['model']} is in {drone['location']}, mission is in {mission['location']}.", 
-                        "can_override": True
-                    })
-
-                # 4. Pilot-Drone Mismatch (CRITICAL/HARD?) - Let's make it HARD for safety
-                if pilot_id:
-                     pilot = self.dm.get_pilot(pilot_id)
-                     if pilot and pilot['location'] != drone['location']:
-                         conflicts.append({
-                            "type": "LOCATION_MISMATCH", 
-                            "severity": "HARD", 
-                            "message": f"Pilot ({pilot['location']}) and Drone ({drone['location']}) are in different locations.", 
-                            "can_override": False
-                        })
+                conflicts.extend(self._drone_conflicts(project_id, mission, drone, pilot))
+
+        return conflicts
+
+    @reads
+    def scan_all_conflicts(self):
+        """
+        Checks every current pilot and drone assignment in one pass.
+        Missions are fetched once and assigned resources are grouped by project,
+        instead of calling check_conflicts per pair.
+        Returns a list of {"project_id", "pilot_id" | "drone_id", "conflicts"} for
+        assignments that have conflicts (same conflict dicts as check_conflicts).
+        """
+        missions = {}
+        for mission in self.dm.typed_missions.to_dict(orient='records'):
+            missions.setdefault(mission['project_id'], mission)
+
+        # project_id -> [(key column, typed record)], in roster order
+        assigned = {}
+        for table, key_col in (("pilots", "pilot_id"), ("drones", "drone_id")):
+            typed = getattr(self.dm, "typed_" + table)
+            rows = typed[typed['current_assignment'].isin(missions.keys())]
+            for record in rows.to_dict(orient='records'):
+                assigned.setdefault(record['current_assignment'], []).append((key_col, record))
+
+        results = []
+        for project_id, mission in missions.items():
+            for key_col, record in assigned.get(project_id, []):
+                if pd.isna(mission['start_date']) or pd.isna(mission['end_date']):
+                    conflicts = [{"type": "DATA_ERROR", "severity": "HARD", "message": f"Invalid dates for Mission {project_id}", "can_override": False}]
+                elif key_col == "pilot_id":
+                    conflicts = self._pilot_conflicts(project_id, mission, record)
+                else:
+                    conflicts = self._drone_conflicts(project_id, mission, record)
+                if conflicts:
+                    results.append({"project_id": project_id, key_col: record[key_col], "conflicts": conflicts})
+        return results
+
+    def _pilot_conflicts(self, project_id, mission, pilot):
+        """Conflicts for one typed pilot against one typed mission with valid dates."""
+        conflicts = []
+        mission_start = mission['start_date']
+        mission_end = mission['end_date']
+
+        # 1. Status Check
+        if pilot['status'] == 'On Leave':
+            conflicts.append({"type": "UNAVAILABLE", "severity": "HARD", "message": f"Pilot {pilot['name']} is On Leave.", "can_override": False})
+        elif pilot['status'] == 'Unavailable':
+            conflicts.append({"type": "UNAVAILABLE", "severity": "HARD", "message": f"Pilot {pilot['name']} is Unavailable.", "can_override": False})
+
+        # 2. Double Booking
+        for _, _, other_id in self.dm.bookings_overlapping("pilots", pilot['pilot_id'], mission_start, mission_end):
+            if other_id != project_id:
+                conflicts.append({
+                    "type": "DOUBLE_BOOKING", 
+                    "severity": "HARD", 
+                    "message": f"Pilot {pilot['name']} is assigned to {other_id} during these dates.", 
+                    "can_override": False
+                })
+
+        # 3. Certification (HARD)
+        missing_certs = [c for c in mission['required_certs'] if c not in pilot['certifications']]
+        if missing_certs:
+            conflicts.append({
+                "type": "CERTIFICATION_MISSING", 
+                "severity": "HARD", 
+                "message": f"Pilot {pilot['name']} missing required certs: {', '.join(missing_certs)}", 
+                "can_override": False
+            })
+
+        # 4. Skills (SOFT - Explicit override required)
+        missing_skills = [s for s in mission['required_skills'] if s not in pilot['skills']]
+        if missing_skills:
+            conflicts.append({
+                "type": "SKILL_MISMATCH", 
+                "severity": "SOFT", 
+                "message": f"Pilot {pilot['name']} missing preferred skills: {', '.join(missing_skills)}", 
+                "can_override": True
+            })
+
+        # 5. Location (SOFT)
+        if pilot['location'] != mission['location']:
+             conflicts.append({
+                "type": "LOCATION_MISMATCH", 
+                "severity": "SOFT", 
+                "message": f"Pilot {pilot['name']} is in {pilot['location']}, mission is in {mission['location']}.", 
+                "can_override": True
+            })
+
+        return conflicts
+
+    def _drone_conflicts(self, project_id, mission, drone, pilot=None):
+        """Conflicts for one typed drone (and the pilot flying it, if any) against one typed mission."""
+        conflicts = []
+        mission_start = mission['start_date']
+        mission_end = mission['end_date']
+
+        # 1. Maintenance (HARD)
+        if drone['status'] == 'Maintenance':
+            conflicts.append({"type": "MAINTENANCE", "severity": "HARD", "message": f"Drone {drone['model']} is in Maintenance.", "can_override": False})
+
+        # Check Maintenance Due Date
+        maint_date = drone['maintenance_due']
+        if not pd.isna(maint_date) and maint_date < mission_end:
+            # Quote the date as written in the roster
+            maint_raw = self.dm.get_drone(drone['drone_id'])['maintenance_due']
+            conflicts.append({"type": "MAINTENANCE_DUE", "severity": "HARD", "message": f"Drone {drone['model']} maintenance due ({maint_raw}) before mission ends.", "can_override": False})
+
+        # 2. Double Booking (HARD)
+        for _, _, other_id in self.dm.bookings_overlapping("drones", drone['drone_id'], mission_start, mission_end):
+            if other_id != project_id:
+                conflicts.append({
+                    "type": "DOUBLE_BOOKING", 
+                    "severity": "HARD", 
+                    "message": f"Drone {drone['model']} is assigned to {other_id}.", 
+                    "can_override": False
+                })
+
+        # 3. Location (SOFT)
+        if drone['location'] != mission['location']:
+            conflicts.append({
+                "type": "LOCATION_MISMATCH", 
+                "severity": "SOFT", 
+                "message": f"Drone {drone['model']} is in {drone['location']}, mission is in {mission['location']}.", 
+                "can_override": True
+            })
+
+        # 4. Pilot-Drone Mismatch (CRITICAL/HARD?) - Let's make it HARD for safety
+        if pilot and pilot['location'] != drone['location']:
+             conflicts.append({
+                "type": "LOCATION_MISMATCH", 
+                "severity": "HARD", 
+                "message": f"Pilot ({pilot['location']}) and Drone ({drone['location']}) are in different locations.", 
+                "can_override": False
+            })
 
         return conflicts
 
+    @reads
     def query_pilots(self, filters):
         """
         Generic filter for pilots.
         filters: dict of {column: value}
         """
-        df = self.dm.pilots.copy()
-        
-        for key, value in filters.items():
-            if key not in df.columns:
-                continue
-                
-            val_str = str(value).lower().strip()
-            if not val_str: continue # Ignore empty filters
-            
-            # Special handling for list-like columns
-            if key in ['skills', 'certifications']:
-                # Partial match: checks if filter value is present in the comma-separated string
-                df = df[df[key].str.lower().str.contains(val_str, na=False)]
-            else:
-                # Exact match (case-insensitive)
-                df = df[df[key].str.lower() == val_str]
-                
-        return df.to_dict(orient='records')
+        return self._records("pilots", self.filter_positions("pilots", filters))
 
+    @reads
     def query_drones(self, filters):
         """
         Generic filter for drones.
         filters: dict of {column: value}
         """
-        df = self.dm.drones.copy()
-        for key, value in filters.items():
-            if key not in df.columns:
-                continue
-            val_str = str(value).lower().strip()
-            if not val_str: continue # Ignore empty filters
-
-            # Partial match for capabilities
-            if key in ['capabilities']:
-                df = df[df[key].str.lower().str.contains(val_str, na=False)]
-            else:
-                df = df[df[key].str.lower() == val_str]
-        return df.to_dict(orient='records')
+        return self._records("drones", self.filter_positions("drones", filters))
 
+    @reads
     def query_missions(self, filters):
         """
         Generic filter for missions.
         """
-        df = self.dm.missions.copy()
-        for key, value in filters.items():
-             if key not in df.columns:
+        return self._records("missions", self.filter_positions("missions", filters))
+
+    @reads
+    def filter_positions(self, table, filters):
+        """
+        Row positions of `table` ("pilots", "drones", "missions") matching the
+        query_* filters, in table order. List columns (skills, certifications,
+        capabilities, mission requirements) match whole items, every item of
+        the filter value; other columns match the whole value. Both are
+        case-insensitive. Indexed columns are answered from dm.filters without
+        touching the table; the rest are compared on the surviving rows only.
+        """
+        df = getattr(self.dm, table)
+        active = {}
+        for key, value in (filters or {}).items():
+            if key not in df.columns:
                 continue
-             val_str = str(value).lower().strip()
-             if not val_str: continue # Ignore empty filters
-             
-             if key in ['required_skills', 'required_certs']:
-                 df = df[df[key].str.lower().str.contains(val_str, na=False)]
-             else:
-                 df = df[df[key].str.lower() == val_str]
-        return df.to_dict(orient='records')
+            val_str = str(value).lower().strip()
+            if not val_str: continue # Ignore empty filters
+            active[key] = val_str
+
+        positions, rest = self.dm.filters[table].select(active)
+        for key, val_str in rest.items():
+            # Exact match (case-insensitive)
+            column = df[key].iloc[positions]
+            positions = positions[(column.str.lower() == val_str).to_numpy(dtype=bool)]
+        return positions
 
+    def _records(self, table, positions, fields=None):
+        df = getattr(self.dm, table)
+        if fields is not None:
+            df = df[fields]
+        return df.iloc[positions].to_dict(orient='records')
+
+    @reads
     def find_matches(self, project_id):
-        mission = self.dm.get_mission(project_id)
-        if not mission: return {"pilots": [], "drones": []}
+        mission = self.dm.get_typed_mission(project_id)
+        if not mission: return {"pilots": [], "drones": [], "pairs": []}
         
-        req_skills = self.parse_skills(mission['required_skills'])
-        req_certs = self.parse_skills(mission['required_certs'])
+        # Score every pilot at once, then only build result dicts for the top 5
+        cert_matrix, skill_matrix = self._pilot_matrices()
+        scores, _, _ = scoring.score_pilots(self.dm.typed_pilots, mission, cert_matrix, skill_matrix)
+        top = scoring.top_k(scores, 5)
         
-        candidates = []
-        for _, pilot in self.dm.pilots.iterrows():
-            pilot = pilot.to_dict()
-            score = 0
-            issues = []
-            eligible = True
-            
-            # 1. Certifications Check (Critical)
-            p_certs = self.parse_skills(pilot['certifications'])
-            missing_certs = [c for c in req_certs if c not in p_certs]
-            if missing_certs:
-                eligible = False
-                issues.append(f"Missing Certs: {', '.join(missing_certs)}")
-                score -= 50
-            else:
-                score += 50
-            
-            # 2. Location Check (Important but maybe overrideable?)
-            # Strictly speaking, for "Best Pilot", we prefer location match.
-            if pilot['location'] != mission['location']:
-                eligible = False # Mark ineligible for "perfect match", but keep in list
-                issues.append(f"Location mismatch ({pilot['location']})")
-                score -= 30
-            else:
-                score += 30
-            
-            # 3. Skills Check (Desirable)
-            p_skills = self.parse_skills(pilot['skills'])
-            missing_skills = [s for s in req_skills if s not in p_skills]
-            if missing_skills:
-                 score -= 10 * len(missing_skills)
-                 issues.append(f"Missing Skills: {', '.join(missing_skills)}")
-            else:
-                 score += 20
-
-            # 4. Status Check
-            if pilot['status'] == 'Available':
-                score += 20
-            elif pilot['status'] == 'On Leave':
-                eligible = False
-                issues.append("Pilot On Leave")
-                score -= 100
-            elif pilot['status'] == 'Assigned':
-                eligible = False
-                issues.append(f"Already Assigned ({pilot.get('current_assignment', '')})")
-                score -= 50
+        candidates = [self._match_candidate(pos, int(scores[pos]), mission) for pos in top]
+        return {"pilots": candidates, "mission_id": project_id, "pairs": self._match_pairs(mission, scores)}
 
-            candidates.append({
-                "id": pilot['pilot_id'],
-                "name": pilot['name'],
-                "score": score,
-                "location": pilot['location'],
-                "status": pilot['status'],
-                "eligible": eligible,
-                "issues": issues,
-                "certifications": pilot['certifications'],
-                "skills": pilot['skills']
+    def _match_pairs(self, mission, pilot_scores, k=5):
+        """
+        Top k (pilot, drone) pairs for a typed mission, one per pilot with the
+        best drone at the pilot's location. Drones with a HARD conflict
+        (maintenance, due before the mission ends, booked over its dates) are
+        skipped and the rest reduced to the best one per location, so the
+        search is pilots + drones rather than pilots x drones.
+        """
+        if pd.isna(mission['start_date']) or pd.isna(mission['end_date']):
+            return []
+        drones = self.dm.typed_drones
+        usable = (drones['status'] != 'Maintenance').to_numpy(dtype=bool)
+        usable &= ~(drones['maintenance_due'] < mission['end_date']).to_numpy(dtype=bool)
+        positions = np.flatnonzero(usable)
+        if not len(positions):
+            return []
+
+        drone_scores = scoring.score_drones(drones, mission, self._drone_capabilities())
+        # Best drone per location, best first (roster order on ties). Bookings
+        # are only looked up for drones that would otherwise win a location.
+        order = positions[np.argsort(-drone_scores[positions], kind="stable")]
+        locations = drones['location'].astype(str).to_numpy()[order].tolist()
+        assigned = (drones['current_assignment'] != '–').to_numpy(dtype=bool)[order].tolist()
+        wanted = len(set(locations))
+        best_drone = {}
+        for pos, location, has_assignment in zip(order.tolist(), locations, assigned):
+            if location in best_drone:
+                continue
+            if has_assignment:
+                bookings = self.dm.bookings_overlapping("drones", drones['drone_id'].iat[pos], mission['start_date'], mission['end_date'])
+                if any(other_id != mission['project_id'] for _, _, other_id in bookings):
+                    continue
+            best_drone[location] = pos
+            if len(best_drone) == wanted:
+                break
+
+        drone_for_pilot = self.dm.typed_pilots['location'].astype(str).map(best_drone).fillna(-1).to_numpy(dtype=np.int64)
+        with_drone = np.flatnonzero(drone_for_pilot >= 0)
+        pair_scores = pilot_scores[with_drone] + drone_scores[drone_for_pilot[with_drone]]
+        top = scoring.top_k(pair_scores, k)
+
+        pairs = []
+        for i in top:
+            pos = with_drone[i]
+            drone_pos = drone_for_pilot[pos]
+            drone = self.dm.drones.iloc[drone_pos]
+            pilot = self._match_candidate(pos, int(pilot_scores[pos]), mission)
+            pairs.append({
+                "pilot_id": pilot['id'],
+                "drone_id": drone['drone_id'],
+                "location": drone['location'],
+                "score": int(pair_scores[i]),
+                "eligible": pilot['eligible'],
+                "pilot": pilot,
+                "drone": {
+                    "id": drone['drone_id'],
+                    "model": drone['model'],
+                    "score": int(drone_scores[drone_pos]),
+                    "status": drone['status'],
+                    "capabilities": drone['capabilities'],
+                    "maintenance_due": drone['maintenance_due'],
+                },
             })
-            
-        # Sort by Score (Higher is better)
-        candidates.sort(key=lambda x: x['score'], reverse=True)
+        return pairs
+
+    def _drone_capabilities(self):
+        # Capability bitmap for scoring.score_drones
+        return self._bitmap("drones", "capabilities")
+
+    def _pilot_matrices(self):
+        return self._bitmap("pilots", "certifications"), self._bitmap("pilots", "skills")
+
+    def _bitmap(self, table, column):
+        """
+        MembershipMatrix of a typed list column. Built once per load or refresh;
+        rows edited since (dm.list_edits) are patched in, and other mutations
+        (status, assignments) don't touch it at all.
+        """
+        with self._bitmaps_lock:
+            generation, applied, matrix = self._bitmaps.get((table, column), (None, 0, None))
+            edits = self.dm.list_edits[table]
+            typed = getattr(self.dm, "typed_" + table)
+            if generation != self.dm.list_generation:
+                matrix = scoring.MembershipMatrix(typed[column].tolist())
+            else:
+                for pos in edits[applied:]:
+                    matrix.set_row(pos, typed[column].iat[pos])
+            self._bitmaps[(table, column)] = (self.dm.list_generation, len(edits), matrix)
+            return matrix
+
+    def _match_candidate(self, pos, score, mission):
+        pilot = self.dm.pilots.iloc[pos].to_dict()
+        typed = self.dm.typed_pilots
+        issues = []
+        eligible = True
+        
+        # 1. Certifications Check (Critical)
+        p_certs = typed['certifications'].iat[pos]
+        missing_certs = [c for c in mission['required_certs'] if c not in p_certs]
+        if missing_certs:
+            eligible = False
+            issues.append(f"Missing Certs: {', '.join(missing_certs)}")
+        
+        # 2. Location Check (Important but maybe overrideable?)
+        # Strictly speaking, for "Best Pilot", we prefer location match.
+        if pilot['location'] != mission['location']:
+            eligible = False # Mark ineligible for "perfect match", but keep in list
+            issues.append(f"Location mismatch ({pilot['location']})")
         
-        # Return top 5, or more if needed
-        return {"pilots": candidates[:5], "mission_id": project_id}
+        # 3. Skills Check (Desirable)
+        p_skills = typed['skills'].iat[pos]
+        missing_skills = [s for s in mission['required_skills'] if s not in p_skills]
+        if missing_skills:
+             issues.append(f"Missing Skills: {', '.join(missing_skills)}")
 
+        # 4. Status Check
+        if pilot['status'] == 'On Leave':
+            eligible = False
+            issues.append("Pilot On Leave")
+        elif pilot['status'] == 'Assigned':
+            eligible = False
+            issues.append(f"Already Assigned ({pilot.get('current_assignment', '')})")
+
+        return {
+            "id": pilot['pilot_id'],
+            "name": pilot['name'],
+            "score": score,
+            "location": pilot['location'],
+            "status": pilot['status'],
+            "eligible": eligible,
+            "issues": issues,
+            "certifications": pilot['certifications'],
+            "skills": pilot['skills']
+        }
+
+    @reads
     def suggest_reassignments(self, project_id, urgent_mode=False):
         """
         Returns candidates for reassignment.
         Only returns if urgent_mode is True or priority matches.
         """
-        mission = self.dm.get_mission(project_id)
+        mission = self.dm.get_typed_mission(project_id)
         if not mission: return []
         
         if mission['priority'] != 'Urgent' and not urgent_mode:
             return []
 
+        # Reassignment Logic
+        # We can bump if current project priority is LOWER than new project priority
+        # Urgent > High > Standard > Low
+        mys_prio = scoring.PRIORITY_RANK.get(mission['priority'], 1)
+        index = self._priority_index()
+        bumpable = index["positions"][:np.searchsorted(index["ranks"], mys_prio)]
+
+        # Check basic qualifications (Hard constraints)
+        cert_matrix, _ = self._pilot_matrices()
+        qualified = cert_matrix.missing_count(mission['required_certs']) == 0
+
+        typed = self.dm.typed_pilots
         candidates = []
-        req_skills = self.parse_skills(mission['required_skills'])
-        req_certs = self.parse_skills(mission['required_certs'])
-        
-        for _, pilot in self.dm.pilots.iterrows():
-            pilot = pilot.to_dict()
-            
-            # Only look at assigned pilots
-            if pilot['current_assignment'] == '–': continue
-            
-            # Check basic qualifications (Hard constraints)
-            p_certs = self.parse_skills(pilot['certifications'])
-            if not all(c in p_certs for c in req_certs): continue
-            
-            curr_proj = self.dm.get_mission(pilot['current_assignment'])
-            if not curr_proj: continue
-            
-            # Reassignment Logic
-            # We can bump if current project priority is LOWER than new project priority
-            # Urgent > High > Standard > Low
-            priority_rank = {"Urgent": 4, "High": 3, "Standard": 2, "Low": 1}
-            mys_prio = priority_rank.get(mission['priority'], 1)
-            cur_prio = priority_rank.get(curr_proj['priority'], 1)
-            
-            if mys_prio > cur_prio:
-                 candidates.append({
-                     "pilot_id": pilot['pilot_id'],
-                     "name": pilot['name'],
-                     "current_assignment": pilot['current_assignment'],
-                     "current_priority": curr_proj['priority'],
-                     "location_match": pilot['location'] == mission['location']
-                 })
-                 
+        for pos in np.sort(bumpable[qualified[bumpable]]):
+            assignment = typed['current_assignment'].iat[pos]
+            candidates.append({
+                "pilot_id": typed['pilot_id'].iat[pos],
+                "name": typed['name'].iat[pos],
+                "current_assignment": assignment,
+                "current_priority": index["priority"][assignment],
+                "location_match": typed['location'].iat[pos] == mission['location']
+            })
         return candidates
 
+    def _priority_index(self):
+        """
+        Assigned pilots sorted by the priority rank of their current mission
+        (lowest first), so "who could be bumped for rank r" is a prefix.
+        Rebuilt only when the data version changes.
+        """
+        tag = self.dm.data_tag()
+        if self._priority_source == tag:
+            return self._priority_cache
+        typed = self.dm.typed_pilots
+        priority = {}
+        positions, ranks = [], []
+        for pos, assignment in enumerate(typed['current_assignment'].tolist()):
+            if assignment == '–': continue
+            if assignment not in priority:
+                mission = self.dm.get_typed_mission(assignment)
+                priority[assignment] = mission['priority'] if mission else None
+            if priority[assignment] is None: continue
+            positions.append(pos)
+            ranks.append(scoring.PRIORITY_RANK.get(priority[assignment], 1))
+        order = np.argsort(ranks, kind="stable")
+        index = {
+            "positions": np.array(positions, dtype=np.int64)[order],
+            "ranks": np.array(ranks, dtype=np.int64)[order],
+            "priority": priority, # project_id -> priority of assigned missions
+            "staff": Counter(typed['current_assignment'].iat[pos] for pos in positions), # project_id -> pilots on it
+        }
+        self._priority_cache, self._priority_source = index, tag
+        return index
+
+    @reads
+    def reassignment_chains(self, project_id, max_hops=3, time_budget=1.0, limit=5, branching=5):
+        """
+        Bump-and-backfill chains that staff `project_id` with a pilot:
+        pilot A moves from a lower-priority mission M1 to it, pilot B moves
+        from an even lower one M2 into M1, ... and the last mission vacated is
+        backfilled with a free pilot or left unstaffed. A chain with no bump
+        is a free pilot taking the mission directly.
+
+        Each placement must be free of HARD pilot conflicts, counting the
+        mission the pilot leaves as free. Chains are ranked by disruption:
+        scoring.DISRUPTION_BUMP per pilot moved, DISRUPTION_SOFT per soft
+        conflict created, plus DISRUPTION_UNSTAFFED for a mission left
+        empty. At most `max_hops` pilots move; each hop tries the `branching`
+        best-scoring candidates; the search stops after `time_budget` seconds.
+        Returns {"project_id", "chains", "explored", "complete"}.
+        """
+        deadline = time.monotonic() + time_budget
+        mission = self.dm.get_typed_mission(project_id)
+        result = {"project_id": project_id, "chains": [], "explored": 0, "complete": True}
+        if not mission or pd.isna(mission['start_date']) or pd.isna(mission['end_date']):
+            return result
+
+        typed = self.dm.typed_pilots
+        index = self._priority_index()
+        cert_matrix, skill_matrix = self._pilot_matrices()
+        free = ((typed['status'] == 'Available') & (typed['current_assignment'] == '–')).to_numpy(dtype=bool)
+        chains = []
+
+        scored = {}
+
+        def candidates(target, pool, used):
+            # Best `branching` pilots in `pool` without missing certs, by find_matches score
+            if target['project_id'] not in scored:
+                scored[target['project_id']] = scoring.score_pilots(typed, target, cert_matrix, skill_matrix)
+            scores, missing_certs, _ = scored[target['project_id']]
+            pool = pool[(missing_certs[pool] == 0) & ~np.isin(pool, list(used))]
+            return pool[scoring.top_k(scores[pool], branching)]
+
+        def extend(target, moves, used, disruption):
+            # `target` needs a pilot; moves so far are (pos, from_project, to_project, soft)
+            if time.monotonic() > deadline:
+                result["complete"] = False
+                return
+            result["explored"] += 1
+            target_rank = scoring.PRIORITY_RANK.get(target['priority'], 1)
+            if moves:
+                if index["staff"][target['project_id']] > 1:
+                    # Other pilots remain on the vacated mission; nothing to backfill
+                    chains.append((disruption, moves, None))
+                    return
+                chains.append((disruption + scoring.DISRUPTION_UNSTAFFED.get(target_rank, 0), moves, target['project_id']))
+            # Staff `target` with a free pilot
+            for pos in candidates(target, np.flatnonzero(free), used):
+                soft = self._placement_soft_conflicts(pos, target, None)
+                if soft is not None:
+                    chains.append((disruption + scoring.DISRUPTION_SOFT * soft,
+                                   moves + [(pos, None, target['project_id'], soft)], None))
+            if len(moves) >= max_hops:
+                return
+            # ... or bump a pilot from a strictly lower-priority mission and carry on from there
+            bumpable = index["positions"][:np.searchsorted(index["ranks"], target_rank)]
+            for pos in candidates(target, bumpable, used):
+                source_id = typed['current_assignment'].iat[pos]
+                soft = self._placement_soft_conflicts(pos, target, source_id)
+                if soft is None:
+                    continue
+                extend(self.dm.get_typed_mission(source_id),
+                       moves + [(pos, source_id, target['project_id'], soft)], used | {pos},
+                       disruption + scoring.DISRUPTION_BUMP + scoring.DISRUPTION_SOFT * soft)
+
+        extend(mission, [], set(), 0)
+        chains.sort(key=lambda chain: (chain[0], len(chain[1])))
+        for disruption, moves, unstaffed in chains[:limit]:
+            result["chains"].append({
+                "disruption": disruption,
+                "moves": [{
+                    "pilot_id": typed['pilot_id'].iat[pos],
+                    "name": typed['name'].iat[pos],
+                    "from": source,
+                    "to": target,
+                    "soft_conflicts": soft,
+                } for pos, source, target, soft in moves],
+                "unstaffed": unstaffed,
+            })
+        return result
+
+    def _placement_soft_conflicts(self, pos, mission, vacating):
+        """
+        Number of SOFT conflicts if pilot `pos` takes `mission` after leaving
+        `vacating` (a project_id or None), or None if there is a HARD one.
+        Same rules as _pilot_conflicts.
+        """
+        typed = self.dm.typed_pilots
+        if typed['status'].iat[pos] in ('On Leave', 'Unavailable'):
+            return None
+        if any(c not in typed['certifications'].iat[pos] for c in mission['required_certs']):
+            return None
+        bookings = self.dm.bookings_overlapping("pilots", typed['pilot_id'].iat[pos], mission['start_date'], mission['end_date'])
+        if any(other_id not in (mission['project_id'], vacating) for _, _, other_id in bookings):
+            return None
+        soft = int(any(s not in typed['skills'].iat[pos] for s in mission['required_skills']))
+        soft += int(typed['location'].iat[pos] != mission['location'])
+        return soft
+
+    def plan_assignments(self, project_ids=None, confirm=False, override_soft_conflicts=False, time_limit=10.0):
+        """
+        Staffs every open mission (or just `project_ids`) at once: a free pilot
+        and a free drone at the pilot's location, maximising the total of the
+        find_matches pilot score and scoring.score_drones. Hard conflicts
+        (certifications, maintenance, double bookings, pilot/drone location)
+        are constraints; soft ones are reported per assignment.
+        With confirm=True the plan is applied through assign_batch in the same
+        transaction. Returns {"method", "total_score", "assignments",
+        "unassigned", "elapsed"} plus "applied" (assign_batch results).
+        """
+        started = time.monotonic()
+        with self.dm.transaction() if confirm else self.dm.read():
+            plan = self._plan(project_ids, started + time_limit)
+            if confirm and plan["assignments"]:
+                items = [dict({k: a[k] for k in a["planned"]}, project_id=a["project_id"]) for a in plan["assignments"]]
+                plan["applied"] = self.assign_batch(items, confirm=True, override_soft_conflicts=override_soft_conflicts)
+        plan["elapsed"] = round(time.monotonic() - started, 3)
+        return plan
+
+    def _plan(self, project_ids, deadline):
+        pilots, drones, missions = self.dm.typed_pilots, self.dm.typed_drones, self.dm.typed_missions
+        pilot_loc = pilots['location'].astype(str).to_numpy()
+        drone_loc = drones['location'].astype(str).to_numpy()
+        # Current crews; a resource holds at most one assignment
+        crew_pilot = {a: pos for pos, a in reversed(list(enumerate(pilots['current_assignment']))) if a != '–'}
+        crew_drone = {a: pos for pos, a in reversed(list(enumerate(drones['current_assignment']))) if a != '–'}
+        free_pilots = np.flatnonzero(((pilots['status'] == 'Available') & (pilots['current_assignment'] == '–')).to_numpy(dtype=bool))
+        free_drones = np.flatnonzero(((drones['status'] == 'Available') & (drones['current_assignment'] == '–')).to_numpy(dtype=bool))
+        wanted = set(project_ids) if project_ids else None
+
+        unassigned = []
+        need_pilot, need_drone = [], [] # mission records
+        for mission in missions.to_dict(orient='records'):
+            project_id = mission['project_id']
+            if wanted is not None and project_id not in wanted:
+                continue
+            if project_id in crew_pilot and project_id in crew_drone:
+                continue
+            if pd.isna(mission['start_date']) or pd.isna(mission['end_date']):
+                unassigned.append({"project_id": project_id, "reason": "Invalid mission dates"})
+                continue
+            if project_id not in crew_pilot:
+                need_pilot.append(mission)
+            if project_id not in crew_drone:
+                need_drone.append(mission)
+        if wanted is not None:
+            known = set(missions['project_id'])
+            unassigned.extend({"project_id": p, "reason": "Mission not found"} for p in sorted(wanted - known))
+
+        # Drones each mission could fly: free, and not due for maintenance before it ends
+        due = drones['maintenance_due'].to_numpy()
+        drone_ok = {}
+        drone_scores = {}
+        for mission in need_drone:
+            ok = np.zeros(len(drones), dtype=bool)
+            ok[free_drones] = True
+            ok &= ~(due < np.datetime64(mission['end_date']))
+            drone_ok[mission['project_id']] = ok
+            drone_scores[mission['project_id']] = scoring.score_drones(drones, mission, self._drone_capabilities())
+
+        # Pilot candidates: free, certified, and at a location with a usable drone
+        cert_matrix, skill_matrix = self._pilot_matrices()
+        pilot_scores = {}
+        weights = np.zeros((len(need_pilot), len(free_pilots)))
+        feasible = np.zeros((len(need_pilot), len(free_pilots)), dtype=bool)
+        for i, mission in enumerate(need_pilot):
+            project_id = mission['project_id']
+            scores, missing_certs, location_match = scoring.score_pilots(pilots, mission, cert_matrix, skill_matrix)
+            pilot_scores[project_id] = scores
+            if project_id in crew_drone:
+                drone_locations = {drone_loc[crew_drone[project_id]]}
+            else:
+                drone_locations = set(drone_loc[drone_ok[project_id]])
+            feasible[i] = (missing_certs[free_pilots] == 0) & np.isin(pilot_loc[free_pilots], list(drone_locations))
+            # Ranked with the location score of the co-located drone it will get
+            weights[i] = scores[free_pilots] + np.where(location_match[free_pilots], scoring.LOCATION_MATCH, scoring.LOCATION_MISMATCH)
+
+        # Pilots first, then drones per location; a mission that finds no drone
+        # at its pilot's location is barred from that location and re-planned
+        methods = set()
+        while True:
+            remaining = max(deadline - time.monotonic(), 0.001)
+            pairs, method = planner.assign(weights, feasible, time_limit=remaining)
+            methods.add(method)
+            pilot_for = {need_pilot[i]['project_id']: free_pilots[j] for i, j in pairs}
+            drone_for, retry = {}, []
+            by_location = {}
+            for mission in need_drone:
+                project_id = mission['project_id']
+                pilot_pos = pilot_for.get(project_id, crew_pilot.get(project_id))
+                if pilot_pos is not None:
+                    by_location.setdefault(pilot_loc[pilot_pos], []).append(mission)
+            for location, group in by_location.items():
+                at_location = np.flatnonzero(drone_loc == location)
+                d_feasible = np.array([drone_ok[m['project_id']][at_location] for m in group])
+                d_weights = np.array([drone_scores[m['project_id']][at_location] for m in group])
+                d_pairs, method = planner.assign(d_weights, d_feasible, time_limit=max(deadline - time.monotonic(), 0.001))
+                methods.add(method)
+                for i, j in d_pairs:
+                    drone_for[group[i]['project_id']] = at_location[j]
+                retry += [m['project_id'] for m in group if m['project_id'] not in drone_for and m['project_id'] in pilot_for]
+            if not retry or time.monotonic() > deadline:
+                break
+            for i, mission in enumerate(need_pilot):
+                if mission['project_id'] in retry:
+                    feasible[i] &= pilot_loc[free_pilots] != pilot_loc[pilot_for[mission['project_id']]]
+
+        assignments = []
+        total = 0
+        in_plan = {m['project_id'] for m in need_pilot + need_drone}
+        for project_id in missions['project_id']:
+            if project_id not in in_plan:
+                continue
+            in_plan.discard(project_id) # repeated ids: first row only
+            pilot_pos = pilot_for.get(project_id, crew_pilot.get(project_id))
+            drone_pos = drone_for.get(project_id, crew_drone.get(project_id))
+            if pilot_pos is None or drone_pos is None:
+                reason = "No certified free pilot with a usable drone at their location" if pilot_pos is None \
+                    else f"No free drone at {pilot_loc[pilot_pos]} that is clear of maintenance"
+                if not any(u['project_id'] == project_id for u in unassigned):
+                    unassigned.append({"project_id": project_id, "reason": reason})
+                continue
+            pilot_id = pilots['pilot_id'].iat[pilot_pos]
+            drone_id = drones['drone_id'].iat[drone_pos]
+            planned = ([] if project_id in crew_pilot else ["pilot_id"]) + ([] if project_id in crew_drone else ["drone_id"])
+            # Same rules as assign_resource, so the plan never proposes something it would block.
+            # Hard conflicts the existing crew member already had aren't the plan's doing.
+            conflicts = self.check_conflicts(project_id, pilot_id=pilot_id, drone_id=drone_id)
+            existing = []
+            if len(planned) == 1:
+                kept = {"pilot_id": pilot_id} if "drone_id" in planned else {"drone_id": drone_id}
+                existing = [c['message'] for c in self.check_conflicts(project_id, **kept)]
+            hard = [c['message'] for c in conflicts if c['severity'] == "HARD" and c['message'] not in existing]
+            if hard:
+                unassigned.append({"project_id": project_id, "reason": "; ".join(hard)})
+                continue
+            score = 0
+            if "pilot_id" in planned:
+                score += int(pilot_scores[project_id][pilot_pos])
+            if "drone_id" in planned:
+                score += int(drone_scores[project_id][drone_pos])
+            total += score
+            assignments.append({
+                "project_id": project_id,
+                "pilot_id": pilot_id,
+                "drone_id": drone_id,
+                "planned": planned,
+                "score": score,
+                "location": pilot_loc[pilot_pos],
+                "conflicts": conflicts,
+            })
+
+        methods.discard("empty")
+        return {
+            "method": "greedy" if "greedy" in methods else "hungarian" if methods else "none",
+            "total_score": total,
+            "assignments": assignments,
+            "unassigned": unassigned,
+        }
+
+    @transactional
     def assign_resource(self, project_id, resource_id, resource_type, confirm=False, override_soft_conflicts=False):
         # 1. Check Conflicts
         if resource_type.lower() == "pilot":
@@ -374,3 +793,97 @@ class Logic:
                 return {"success": True, "message": f"Assigned Drone {resource_id} to {project_id}"}
                 
         return {"success": False, "message": "Database update failed."}
+
+    def assign_batch(self, items, confirm=False, override_soft_conflicts=False, mode="best_effort"):
+        """
+        Assigns several resources in one pass and saves once at the end.
+        items: dicts with project_id plus pilot_id and/or drone_id (a pair is
+        checked together and assigned together), or resource_id + resource_type.
+        Each item is checked against the roster as left by the earlier items, so
+        two items double-booking the same pilot are caught.
+        mode="all_or_nothing" undoes every applied item if any item fails.
+        Returns one assign_resource-style result per item, in order.
+        """
+        if mode not in ("best_effort", "all_or_nothing"):
+            raise ValueError(f"Unknown batch mode: {mode}")
+        results = []
+        undo = [] # (table, key, previous fields), in application order
+        # One transaction: saves are batched and no other request interleaves
+        with self.dm.transaction():
+            for item in items:
+                parsed = self._batch_item(item)
+                if parsed is None:
+                    results.append({"success": False, "message": f"Invalid batch item: {item}"})
+                    continue
+                project_id, resources = parsed
+                item_confirm = item.get("confirm", confirm)
+                item_override = item.get("override_soft_conflicts", override_soft_conflicts)
+                before = self._assignment_state(resources)
+                if len(resources) == 1:
+                    resource_type, resource_id = resources[0]
+                    result = self.assign_resource(project_id, resource_id, resource_type,
+                                                  confirm=item_confirm, override_soft_conflicts=item_override)
+                else:
+                    result = self._assign_pair(project_id, dict(resources), item_confirm, item_override)
+                if result.get("success"):
+                    undo.extend(before)
+                results.append(dict(result, project_id=project_id, **{f"{t}_id": r for t, r in resources}))
+
+            if mode == "all_or_nothing" and undo and not all(r.get("success") for r in results):
+                for table, key, fields in reversed(undo):
+                    self.dm.update_record(table, key, fields)
+                for result in results:
+                    if result.get("success"):
+                        result.update(success=False, rolled_back=True,
+                                      message=f"Rolled back: {result['message']} (another item in the batch failed)")
+        return results
+
+    @reads
+    def check_conflicts_batch(self, items):
+        """
+        check_conflicts for many (project_id, pilot_id, drone_id) items against
+        one consistent snapshot of the roster. Returns
+        [{"project_id", "pilot_id", "drone_id", "conflicts"}] in input order.
+        """
+        return [{
+            "project_id": item.get("project_id"),
+            "pilot_id": item.get("pilot_id"),
+            "drone_id": item.get("drone_id"),
+            "conflicts": self.check_conflicts(item.get("project_id"), pilot_id=item.get("pilot_id"), drone_id=item.get("drone_id")),
+        } for item in items]
+
+    def _assign_pair(self, project_id, resources, confirm, override_soft_conflicts):
+        # Same rules as assign_resource, with the pilot/drone location check across the pair
+        conflicts = self.check_conflicts(project_id, pilot_id=resources["pilot"], drone_id=resources["drone"])
+        hard_conflicts = [c for c in conflicts if c['severity'] == "HARD"]
+        soft_conflicts = [c for c in conflicts if c['severity'] == "SOFT"]
+        if hard_conflicts:
+            return {"success": False, "message": "Assignment blocked by HARD conflicts.", "conflicts": hard_conflicts}
+        if soft_conflicts and not override_soft_conflicts:
+            return {"success": False, "message": "Soft conflicts detected. Confirmation required.",
+                    "conflicts": soft_conflicts, "requires_confirmation": True}
+        if not confirm:
+            return {"success": False, "message": "Dry Run Successful. Please set confirm=True to execute.", "conflicts": soft_conflicts}
+        if self.dm.assign_pilot_to_mission(resources["pilot"], project_id) and self.dm.assign_drone_to_mission(resources["drone"], project_id):
+            return {"success": True, "message": f"Assigned Pilot {resources['pilot']} and Drone {resources['drone']} to {project_id}"}
+        return {"success": False, "message": "Database update failed."}
+
+    def _assignment_state(self, resources):
+        state = []
+        for resource_type, resource_id in resources:
+            table = resource_type + "s"
+            record = self.dm.get_pilot(resource_id) if table == "pilots" else self.dm.get_drone(resource_id)
+            if record:
+                state.append((table, resource_id, {"status": record["status"], "current_assignment": record["current_assignment"]}))
+        return state
+
+    def _batch_item(self, item):
+        # -> (project_id, [(resource_type, resource_id), ...]) or None
+        project_id = item.get("project_id")
+        if item.get("resource_id") and item.get("resource_type"):
+            resources = [(item["resource_type"].lower(), item["resource_id"])]
+        else:
+            resources = [(t, item[f"{t}_id"]) for t in ("pilot", "drone") if item.get(f"{t}_id")]
+        if not project_id or not resources or any(t not in ("pilot", "drone") for t, _ in resources):
+            return None
+        return project_id, resources
@@ -0,0 +1,89 @@
+import pandas as pd
+from dateutil import parser
+
+# Raw columns of each table, as stored in the CSVs / Sheets tabs
+PILOT_COLUMNS = ["pilot_id", "name", "skills", "certifications", "location", "status", "current_assignment", "available_from"]
+DRONE_COLUMNS = ["drone_id", "model", "capabilities", "status", "location", "current_assignment", "maintenance_due"]
+MISSION_COLUMNS = ["project_id", "client", "location", "required_skills", "required_certs", "start_date", "end_date", "priority"]
+
+# How each column is typed by normalise(). Anything not listed stays a plain string.
+# Resource skills/certs are frozensets (membership tests); mission requirements are
+# tuples so conflict messages keep the order they were written in.
+SET_COLUMNS = {
+    "pilots": ["skills", "certifications"],
+    "drones": ["capabilities"],
+    "missions": [],
+}
+TUPLE_COLUMNS = {
+    "pilots": [],
+    "drones": [],
+    "missions": ["required_skills", "required_certs"],
+}
+DATE_COLUMNS = {
+    "pilots": ["available_from"],
+    "drones": ["maintenance_due"],
+    "missions": ["start_date", "end_date"],
+}
+CATEGORY_COLUMNS = {
+    "pilots": ["status", "location"],
+    "drones": ["status", "location"],
+    "missions": ["location", "priority"],
+}
+
+
+def split_list(value):
+    """Splits a comma separated cell into lowercase, stripped items."""
+    if pd.isna(value) or str(value).strip() == "":
+        return []
+    return [s.strip().lower() for s in str(value).split(',')]
+
+
+def parse_date(value):
+    """Parses a date cell, returning NaT when it is empty or malformed."""
+    try:
+        return pd.Timestamp(parser.parse(str(value)))
+    except (ValueError, OverflowError, TypeError):
+        return pd.NaT
+
+
+def parse_value(table, col, value):
+    """Converts a single raw cell to the type normalise() gives its column."""
+    if col in SET_COLUMNS[table]:
+        return frozenset(split_list(value))
+    if col in TUPLE_COLUMNS[table]:
+        return tuple(split_list(value))
+    if col in DATE_COLUMNS[table]:
+        return parse_date(value)
+    return value
+
+
+def _map_unique(series, fn):
+    # Rosters repeat the same handful of values, so parse each distinct one once
+    cache = {}
+    values = []
+    for raw in series.tolist():
+        if raw not in cache:
+            cache[raw] = fn(raw)
+        values.append(cache[raw])
+    return pd.Series(values, index=series.index, dtype=object)
+
+
+def normalise(table, df):
+    """
+    Returns a typed copy of a raw (all-string) table, row-aligned with it.
+    """
+    typed = df.copy()
+    for col in SET_COLUMNS[table]:
+        typed[col] = _map_unique(df[col], lambda v: frozenset(split_list(v)))
+    for col in TUPLE_COLUMNS[table]:
+        typed[col] = _map_unique(df[col], lambda v: tuple(split_list(v)))
+    for col in DATE_COLUMNS[table]:
+        dates = _map_unique(df[col], parse_date)
+        try:
+            dates = pd.to_datetime(dates)
+        except (ValueError, TypeError):
+            pass # Mixed timezones, keep Timestamp objects
+        typed[col] = dates
+    for col in CATEGORY_COLUMNS[table]:
+        typed[col] = df[col].astype("category")
+    return typed
@@ -0,0 +1,168 @@
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+# Longest prefix first so "PRJ001" is never read as a pilot id
+ENTITY_PATTERN = re.compile(r"\b(prj|p|d)(\d+)\b", re.IGNORECASE)
+ENTITY_KINDS = {"prj": "project", "p": "pilot", "d": "drone"}
+
+
+def template_utterance(text):
+    """
+    Normalises a message and templates its entity ids out:
+        "Assign P004 to PRJ002!" -> ("assign {pilot0} to {project0}", {"{pilot0}": "P004", "{project0}": "PRJ002"})
+    The same id used twice gets the same placeholder.
+    """
+    clean = " ".join(text.lower().split()).rstrip(".!?")
+    entities = {}
+    by_id = {}
+    counts = {}
+
+    def replace(match):
+        entity_id = (match.group(1) + match.group(2)).upper()
+        if entity_id not in by_id:
+            kind = ENTITY_KINDS[match.group(1).lower()]
+            placeholder = "{%s%d}" % (kind, counts.get(kind, 0))
+            counts[kind] = counts.get(kind, 0) + 1
+            by_id[entity_id] = placeholder
+            entities[placeholder] = entity_id
+        return by_id[entity_id]
+
+    return ENTITY_PATTERN.sub(replace, clean), entities
+
+
+def _to_template(value, by_id):
+    # Returns the templated value, or raises ValueError if an id can't be tied to the utterance
+    if isinstance(value, dict):
+        return {k: _to_template(v, by_id) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_to_template(v, by_id) for v in value]
+    if isinstance(value, str):
+        stripped = value.strip().upper()
+        if stripped in by_id:
+            return by_id[stripped]
+        if ENTITY_PATTERN.search(value):
+            raise ValueError(f"untemplatable id in {value!r}")
+    return value
+
+
+def _from_template(value, entities):
+    if isinstance(value, dict):
+        return {k: _from_template(v, entities) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_from_template(v, entities) for v in value]
+    if isinstance(value, str) and value in entities:
+        return entities[value]
+    return value
+
+
+class NLUCache:
+    """
+    LRU + TTL cache of NLU tool calls keyed by templated utterance, so
+    "check conflicts for PRJ001" and "check conflicts for PRJ007" share one
+    entry. Entries are plain JSON and can be saved to / loaded from `path`.
+    """
+    def __init__(self, max_size=512, ttl=24 * 3600, path=None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.path = path
+        self._entries = OrderedDict() # key -> (stored_at, templated tool call)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if path:
+            self.load()
+
+    def get(self, text):
+        """Returns a fresh tool call for `text` with its ids substituted in, or None."""
+        key, entities = template_utterance(text)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.time() - entry[0] > self.ttl:
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            tool_call = entry[1]
+        # _from_template rebuilds every dict/list, so callers can't mutate the cached entry
+        return _from_template(tool_call, entities)
+
+    def put(self, text, tool_call):
+        """Caches `tool_call` for `text`. Returns False if it references ids not found in `text`."""
+        key, entities = template_utterance(text)
+        try:
+            templated = _to_template(tool_call, {v: k for k, v in entities.items()})
+        except ValueError:
+            return False
+        with self._lock:
+            self._entries[key] = (time.time(), templated)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return True
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+            }
+
+    def save(self, path=None):
+        path = path or self.path
+        if not path:
+            return False
+        now = time.time()
+        with self._lock:
+            entries = [[k, t, v] for k, (t, v) in self._entries.items() if now - t <= self.ttl]
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp", dir=directory)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"entries": entries}, f)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return True
+
+    def load(self, path=None):
+        path = path or self.path
+        if not path or not os.path.exists(path):
+            return 0
+        try:
+            with open(path, encoding="utf-8") as f:
+                entries = json.load(f)["entries"]
+        except (OSError, ValueError, KeyError) as e:
+            logging.warning(f"Ignoring unreadable NLU cache {path}: {e}")
+            return 0
+        now = time.time()
+        with self._lock:
+            # Saved oldest-used first, so replaying keeps the LRU order
+            for key, stored_at, tool_call in entries:
+                if now - stored_at <= self.ttl:
+                    self._entries[key] = (stored_at, tool_call)
+                    self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+            return len(self._entries)
@@ -0,0 +1,69 @@
+import base64
+import json
+import numpy as np
+
+DEFAULT_LIMIT = 1000 # page size when a cursor is sent without a limit
+MAX_LIMIT = 5000
+EXPORT_CHUNK = 500 # rows materialised at a time by ndjson()
+
+
+def encode_cursor(position, key):
+    """Opaque cursor for the row after (position, key)."""
+    raw = json.dumps({"p": int(position), "k": key}, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor):
+    """(position, key) from encode_cursor(); ValueError if it isn't one."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data = json.loads(raw)
+        return int(data["p"]), data["k"]
+    except (ValueError, TypeError, KeyError, AttributeError):
+        raise ValueError("Invalid cursor")
+
+
+def parse_fields(fields, columns):
+    """
+    Projection list from "a,b" or ["a", "b"]; None means every column.
+    Unknown columns raise ValueError.
+    """
+    if fields is None:
+        return None
+    if isinstance(fields, str):
+        fields = fields.split(",")
+    fields = [f.strip() for f in fields if f and f.strip()]
+    if not fields:
+        return None
+    unknown = [f for f in fields if f not in columns]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return list(dict.fromkeys(fields))
+
+
+def page(positions, after=None, limit=DEFAULT_LIMIT):
+    """
+    The next `limit` row positions after position `after` (None = from the start).
+    positions must be ascending. Returns (page, has_more).
+    """
+    start = 0 if after is None else int(np.searchsorted(positions, after, side="right"))
+    chunk = positions[start:start + limit]
+    return chunk, start + limit < len(positions)
+
+
+def records(df, positions, fields=None):
+    """Rows at `positions` as dicts, restricted to `fields`."""
+    if fields is not None:
+        df = df[fields]
+    return df.iloc[positions].to_dict(orient="records")
+
+
+def ndjson(fetch, positions, chunk=EXPORT_CHUNK):
+    """
+    Yields newline-delimited JSON for the rows at `positions`, `chunk` rows at a
+    time. fetch(chunk_positions) returns their dicts; it is called per chunk so
+    the caller can take its read lock briefly instead of for the whole stream.
+    """
+    for start in range(0, len(positions), chunk):
+        rows = fetch(positions[start:start + chunk])
+        yield "".join(json.dumps(row) + "\n" for row in rows)
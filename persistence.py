@@ -0,0 +1,225 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+
+class WriteBehindQueue:
+    """
+    Runs DataManager saves on a background thread.
+
+    schedule(table) only marks the table as pending; repeated requests for the
+    same table within `window` seconds collapse into one save. flush() is a
+    barrier that returns once everything scheduled before it has been written.
+    """
+    def __init__(self, save_fn, window=0.5):
+        self._save_fn = save_fn # save_fn(table) does the actual I/O
+        self._window = window
+        self._pending = {}      # table -> time of the first unsaved request
+        self._in_flight = 0
+        self._flush_requested = False
+        self._closed = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+        self._thread.start()
+
+    def schedule(self, table):
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("WriteBehindQueue is closed")
+            self._pending.setdefault(table, time.monotonic())
+            self._cond.notify_all()
+
+    def flush(self, timeout=None):
+        """Saves pending tables now and waits for them. Returns False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            self._flush_requested = True
+            self._cond.notify_all()
+            while self._pending or self._in_flight:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+            return True
+
+    def close(self, timeout=None):
+        if self._closed:
+            return
+        self.flush(timeout)
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+
+    @property
+    def pending(self):
+        with self._cond:
+            return sorted(self._pending)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._closed:
+                    if self._pending:
+                        if self._flush_requested:
+                            break
+                        wait = min(self._pending.values()) + self._window - time.monotonic()
+                        if wait <= 0:
+                            break
+                        self._cond.wait(wait)
+                    else:
+                        self._flush_requested = False
+                        self._cond.wait()
+                if self._closed and not self._pending:
+                    return
+                now = time.monotonic()
+                due = [t for t, since in self._pending.items() if self._flush_requested or self._closed or since + self._window <= now]
+                for table in due:
+                    del self._pending[table]
+                self._in_flight += len(due)
+
+            for table in due:
+                try:
+                    self._save_fn(table)
+                except Exception as e:
+                    print(f"Write-behind save of {table} failed: {e}. Retrying in {self._window}s.")
+                    with self._cond:
+                        # Back off for a window instead of spinning on a failing store
+                        self._pending.setdefault(table, time.monotonic())
+                        self._flush_requested = False
+                finally:
+                    with self._cond:
+                        self._in_flight -= 1
+                        if not self._pending and not self._in_flight:
+                            self._flush_requested = False
+                        self._cond.notify_all()
+
+
+def atomic_write_csv(df, path):
+    """Writes a CSV via temp file + rename, so readers never see a half-written file."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "w", newline="", encoding="utf-8") as f:
+            df.to_csv(f, index=False)
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp creates the file 0600; keep the roster's existing permissions
+        if os.path.exists(path):
+            shutil.copymode(path, tmp_path)
+        else:
+            os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class Journal:
+    """
+    Append-only log of row mutations, one JSON object per line:
+        {"table": "pilots", "key": "P001", "fields": {"status": "On Leave"}}
+    Appends cost O(1) regardless of table size. A torn last line (crash
+    mid-append) is ignored by read_from(). After a compaction the file starts with
+        {"base": 1234}
+    the number of bytes compaction has dropped so far, so position() keeps
+    growing across compactions and is the same in every process.
+    """
+    def __init__(self, path, fsync=False):
+        self.path = path
+        self.fsync = fsync
+        self.entries = 0 # appended since the last compaction
+        self._drop_torn_tail()
+        self._file = open(path, "a", encoding="utf-8")
+        self._read_base()
+
+    def _read_base(self):
+        self.base, self._header_len = 0, 0
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "rb") as f:
+            line = f.readline()
+        if line.startswith(b'{"base":') and line.endswith(b"\n"):
+            self.base, self._header_len = json.loads(line)["base"], len(line)
+
+    def position(self, offset):
+        """Byte offset in the current file -> offset in everything ever appended."""
+        return self.base + offset - self._header_len
+
+    def _drop_torn_tail(self):
+        # A crash mid-append leaves a partial last line; cut it so new entries start clean
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "rb+") as f:
+            data = f.read()
+            if data and not data.endswith(b"\n"):
+                f.truncate(data.rfind(b"\n") + 1)
+
+    def append(self, table, key, fields):
+        line = json.dumps({"table": table, "key": key, "fields": fields}, separators=(",", ":"))
+        self._file.write(line + "\n")
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+        self.entries += 1
+
+    def size(self):
+        """Current length of the journal on disk, including other processes' appends."""
+        self._file.flush()
+        return os.path.getsize(self.path) if os.path.exists(self.path) else 0
+
+    def replaced(self):
+        """True if another process compacted (replaced) the file since we opened it."""
+        try:
+            return os.stat(self.path).st_ino != os.fstat(self._file.fileno()).st_ino
+        except FileNotFoundError:
+            return True
+
+    def reopen(self):
+        self._file.close()
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._read_base()
+
+    def read_from(self, start):
+        """Returns ([(table, key, fields)], end offset) for the complete lines after `start`."""
+        self._file.flush()
+        entries = []
+        with open(self.path, "rb") as f:
+            f.seek(start)
+            data = f.read()
+        end = data.rfind(b"\n") + 1 # a line still being appended is left for next time
+        for line in data[:end].decode("utf-8").splitlines():
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            if "base" in entry:
+                continue # compaction header
+            entries.append((entry["table"], entry["key"], entry["fields"]))
+        return entries, start + end
+
+    def drop_before(self, offset):
+        """Discards entries before `offset` (already folded into a snapshot)."""
+        self._file.flush()
+        with open(self.path, "r", encoding="utf-8") as f:
+            f.seek(offset)
+            tail = f.read()
+        header = json.dumps({"base": self.position(offset)}) + "\n"
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(self.path) + ".", suffix=".tmp", dir=directory)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(header + tail)
+            f.flush()
+            os.fsync(f.fileno())
+        self._file.close()
+        os.replace(tmp_path, self.path)
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._read_base()
+        self.entries = tail.count("\n")
+
+    def close(self):
+        self._file.close()
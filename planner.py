@@ -0,0 +1,100 @@
+import time
+import numpy as np
+
+# Matrices up to this many cells are solved exactly; larger ones use the greedy heuristic
+EXACT_MAX_CELLS = 4_000_000
+
+
+def assign(weights, feasible, time_limit=None, exact_max_cells=EXACT_MAX_CELLS):
+    """
+    One-to-one assignment of rows to columns over the `feasible` cells of
+    `weights` (both rows x columns arrays). Assigns as many rows as possible
+    first, then maximises the total weight.
+
+    Instances up to `exact_max_cells` are solved exactly with
+    scipy.optimize.linear_sum_assignment (Hungarian algorithm). Larger ones,
+    or any when scipy isn't installed, get a greedy assignment improved by
+    local search until `time_limit` seconds have passed.
+    Returns ([(row, col), ...], method) with method "hungarian", "greedy" or "empty".
+    """
+    deadline = time.monotonic() + time_limit if time_limit else None
+    weights = np.asarray(weights, dtype=float)
+    feasible = np.asarray(feasible, dtype=bool)
+    # Rows and columns without a single feasible cell can't take part
+    rows = np.flatnonzero(feasible.any(axis=1))
+    cols = np.flatnonzero(feasible.any(axis=0))
+    if not len(rows) or not len(cols):
+        return [], "empty"
+    weights = weights[np.ix_(rows, cols)]
+    feasible = feasible[np.ix_(rows, cols)]
+
+    solver = None
+    if weights.size <= exact_max_cells:
+        try:
+            from scipy.optimize import linear_sum_assignment as solver
+        except ImportError:
+            solver = None
+    if solver is not None:
+        pairs, method = _exact(weights, feasible, solver), "hungarian"
+    else:
+        pairs, method = _greedy(weights, feasible, deadline), "greedy"
+    return [(int(rows[r]), int(cols[c])) for r, c in pairs], method
+
+
+def _exact(weights, feasible, linear_sum_assignment):
+    # Shift feasible weights to >= 1 and add a bonus larger than any total of
+    # them, so one more assigned row always beats a better-scoring smaller set
+    spread = weights[feasible].max() - weights[feasible].min() + 1
+    profit = weights - weights[feasible].min() + 1
+    bonus = spread * min(weights.shape) + 1
+    profit = np.where(feasible, profit + bonus, 0.0)
+    row_ind, col_ind = linear_sum_assignment(profit, maximize=True)
+    return [(r, c) for r, c in zip(row_ind, col_ind) if feasible[r, c]]
+
+
+def _greedy(weights, feasible, deadline):
+    n_rows, n_cols = weights.shape
+    # Best edges first; ties keep row/column order
+    edge_rows, edge_cols = np.nonzero(feasible)
+    order = np.argsort(-weights[edge_rows, edge_cols], kind="stable")
+    row_to_col = {}
+    used = set()
+    for i in order:
+        r, c = int(edge_rows[i]), int(edge_cols[i])
+        if r not in row_to_col and c not in used:
+            row_to_col[r] = c
+            used.add(c)
+            if len(row_to_col) == min(n_rows, n_cols):
+                break
+
+    expired = lambda: deadline is not None and time.monotonic() > deadline
+    improved = True
+    while improved and not expired():
+        improved = False
+        # 1. Unassigned row takes a column whose holder can move to a free column
+        for r in range(n_rows):
+            if r in row_to_col or expired():
+                continue
+            for r2, c2 in list(row_to_col.items()):
+                if not feasible[r, c2]:
+                    continue
+                free = [c for c in np.flatnonzero(feasible[r2]) if c not in used]
+                if free:
+                    best = max(free, key=lambda c: weights[r2, c])
+                    row_to_col[r2] = int(best)
+                    used.add(int(best))
+                    row_to_col[r] = c2
+                    improved = True
+                    break
+        # 2. Pairwise swaps that raise the total weight
+        assigned = list(row_to_col.items())
+        for i, (r1, _) in enumerate(assigned):
+            if expired():
+                break
+            for r2, _ in assigned[i + 1:]:
+                c1, c2 = row_to_col[r1], row_to_col[r2]
+                if (feasible[r1, c2] and feasible[r2, c1]
+                        and weights[r1, c2] + weights[r2, c1] > weights[r1, c1] + weights[r2, c2]):
+                    row_to_col[r1], row_to_col[r2] = c2, c1
+                    improved = True
+    return sorted(row_to_col.items())
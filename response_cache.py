@@ -0,0 +1,60 @@
+import threading
+from collections import OrderedDict
+
+
+class ResponseCache:
+    """
+    LRU cache of rendered read responses, keyed by request and tagged with the
+    DataManager.data_tag() they were built from. An entry is only served for
+    the same tag; the first lookup under a new tag drops everything, so the
+    cache never outlives the data it was built from.
+    """
+    def __init__(self, max_size=256):
+        self.max_size = max_size
+        self._entries = OrderedDict() # key -> value
+        self._tag = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def _check_tag(self, tag):
+        if tag != self._tag:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self._tag = tag
+
+    def get(self, key, tag):
+        with self._lock:
+            self._check_tag(tag)
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, tag, value):
+        with self._lock:
+            self._check_tag(tag)
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "invalidations": self.invalidations,
+            }
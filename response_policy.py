@@ -0,0 +1,92 @@
+import json
+from collections import Counter
+
+CHARS_PER_TOKEN = 4 # rough estimate for English + JSON
+
+
+def needs_llm(tool_call, result):
+    """
+    Only conflict explanations are worth an LLM call; lists, tables and
+    plain successes/errors are rendered from templates.
+    """
+    if not isinstance(result, dict) or "error" in result:
+        return False
+    tool = tool_call.get("tool")
+    if tool == "check_conflicts":
+        return bool(result.get("conflicts"))
+    if tool == "scan_conflicts":
+        return bool(result.get("results"))
+    if tool in ("assign_pilot", "assign_drone"):
+        return not result.get("success") and bool(result.get("conflicts"))
+    return False
+
+
+def estimate_tokens(text):
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def compact_json(value):
+    return json.dumps(value, default=str, separators=(",", ":"))
+
+
+def fit_to_budget(result, max_tokens):
+    """
+    Returns `result` unchanged if its compact JSON fits `max_tokens`, otherwise
+    a copy with every list cut to the same (largest fitting) length plus a
+    summary of what was dropped.
+    """
+    if estimate_tokens(compact_json(result)) <= max_tokens:
+        return result
+
+    summary = _summarise(result)
+    limit = _longest_list(result)
+    while limit > 1:
+        limit //= 2
+        trimmed = _trim_lists(result, limit)
+        if isinstance(trimmed, dict):
+            trimmed = {"summary": summary, **trimmed}
+        if estimate_tokens(compact_json(trimmed)) <= max_tokens:
+            return trimmed
+
+    text = compact_json(result)
+    return {"summary": summary, "truncated": text[:max_tokens * CHARS_PER_TOKEN]}
+
+
+def _longest_list(value):
+    if isinstance(value, dict):
+        return max((_longest_list(v) for v in value.values()), default=0)
+    if isinstance(value, list):
+        return max([len(value)] + [_longest_list(v) for v in value])
+    return 0
+
+
+def _trim_lists(value, limit):
+    if isinstance(value, dict):
+        return {k: _trim_lists(v, limit) for k, v in value.items()}
+    if isinstance(value, list):
+        kept = [_trim_lists(v, limit) for v in value[:limit]]
+        if len(value) > limit:
+            kept.append(f"... {len(value) - limit} more")
+        return kept
+    return value
+
+
+def _summarise(result):
+    # Counts survive truncation, so the LLM can still say "12 conflicts, 9 of them HARD"
+    counts = Counter()
+
+    def walk(value):
+        if isinstance(value, dict):
+            if "severity" in value and "type" in value:
+                counts[f"{value['severity']} {value['type']}"] += 1
+            for v in value.values():
+                walk(v)
+        elif isinstance(value, list):
+            for v in value:
+                walk(v)
+
+    walk(result)
+    summary = {"conflict_counts": dict(counts)}
+    if isinstance(result, dict):
+        summary["item_counts"] = {k: len(v) for k, v in result.items() if isinstance(v, list)}
+    return summary
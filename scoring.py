@@ -0,0 +1,108 @@
+import numpy as np
+
+# Score components used by Logic.find_matches, one value per pilot
+CERT_OK, CERT_MISSING = 50, -50
+LOCATION_MATCH, LOCATION_MISMATCH = 30, -30
+SKILLS_OK, SKILL_MISSING_EACH = 20, -10
+STATUS_SCORES = {"Available": 20, "On Leave": -100, "Assigned": -50}
+# Mission priorities, lowest first: a pilot may only be bumped for a higher rank
+PRIORITY_RANK = {"Urgent": 4, "High": 3, "Standard": 2, "Low": 1}
+# Disruption of a reassignment chain (Logic.reassignment_chains): per pilot
+# bumped, per soft conflict created, and for leaving a mission of a given rank unstaffed
+DISRUPTION_BUMP = 10
+DISRUPTION_SOFT = 3
+DISRUPTION_UNSTAFFED = {1: 25, 2: 50, 3: 100}
+# Drone score (Logic.plan_assignments): location plus each required skill the drone is equipped for
+CAPABILITY_MATCH_EACH = 10
+
+
+class MembershipMatrix:
+    """
+    Boolean rows x vocabulary matrix built from a column of frozensets.
+    Column j is the bitmap of rows holding vocabulary item j.
+    """
+    def __init__(self, sets):
+        self.vocab = {}
+        rows, cols = [], []
+        for row, items in enumerate(sets):
+            for item in items:
+                rows.append(row)
+                cols.append(self.vocab.setdefault(item, len(self.vocab)))
+        self.n_rows = len(sets)
+        self.matrix = np.zeros((self.n_rows, max(len(self.vocab), 1)), dtype=bool)
+        self.matrix[rows, cols] = True
+
+    def set_row(self, row, items):
+        """Replaces the items of one row, e.g. after a pilot's certifications were edited."""
+        cols = [self.vocab.setdefault(item, len(self.vocab)) for item in items]
+        if len(self.vocab) > self.matrix.shape[1]:
+            # New vocabulary item: widen once, never mutate the old array under readers
+            grown = np.zeros((self.n_rows, len(self.vocab)), dtype=bool)
+            grown[:, :self.matrix.shape[1]] = self.matrix
+            self.matrix = grown
+        values = np.zeros(self.matrix.shape[1], dtype=bool)
+        values[cols] = True
+        self.matrix[row] = values
+
+    def missing_count(self, required):
+        """Number of `required` items (with repeats) each row does not hold."""
+        counts = np.zeros(self.n_rows, dtype=np.int64)
+        for item in required:
+            col = self.vocab.get(item)
+            if col is None:
+                counts += 1
+            else:
+                counts += ~self.matrix[:, col]
+        return counts
+
+
+def score_pilots(typed_pilots, mission, cert_matrix, skill_matrix):
+    """
+    Vectorised find_matches score for every pilot against one typed mission.
+    Returns (scores, missing_cert_counts, location_match) as arrays.
+    """
+    missing_certs = cert_matrix.missing_count(mission['required_certs'])
+    missing_skills = skill_matrix.missing_count(mission['required_skills'])
+    location_match = (typed_pilots['location'] == mission['location']).to_numpy(dtype=bool)
+    status = typed_pilots['status']
+
+    scores = np.where(missing_certs > 0, CERT_MISSING, CERT_OK)
+    scores += np.where(location_match, LOCATION_MATCH, LOCATION_MISMATCH)
+    scores += np.where(missing_skills > 0, SKILL_MISSING_EACH * missing_skills, SKILLS_OK)
+    for value, points in STATUS_SCORES.items():
+        scores += np.where((status == value).to_numpy(dtype=bool), points, 0)
+    return scores, missing_certs, location_match
+
+
+def score_drones(typed_drones, mission, capability_matrix=None):
+    """
+    Score of every drone against one typed mission: the pilot location rule,
+    plus CAPABILITY_MATCH_EACH per required skill among its capabilities
+    (e.g. "LiDAR", "Thermal"). capability_matrix is an optional
+    MembershipMatrix of the capabilities column.
+    """
+    location_match = (typed_drones['location'] == mission['location']).to_numpy(dtype=bool)
+    scores = np.where(location_match, LOCATION_MATCH, LOCATION_MISMATCH)
+    required = mission['required_skills']
+    if required:
+        if capability_matrix is None:
+            capability_matrix = MembershipMatrix(typed_drones['capabilities'].tolist())
+        covered = len(required) - capability_matrix.missing_count(required)
+        scores = scores + CAPABILITY_MATCH_EACH * covered
+    return scores
+
+
+def top_k(scores, k):
+    """
+    Positions of the k highest scores, highest first. Ties keep row order,
+    matching a stable descending sort of the whole array.
+    """
+    n = len(scores)
+    if n > k:
+        # Partial selection: everything at or above the k-th largest score
+        kth = np.partition(scores, n - k)[n - k]
+        candidates = np.flatnonzero(scores >= kth)
+    else:
+        candidates = np.arange(n)
+    order = np.argsort(-scores[candidates], kind="stable")
+    return candidates[order][:k]
@@ -0,0 +1,56 @@
+import random
+import threading
+
+
+class SheetsRefresher:
+    """
+    Polls the Google Sheet for edits made outside the app.
+
+    Each poll calls dm.refresh_from_sheets(), which costs a single modifiedTime
+    lookup while the sheet is unchanged and re-downloads only the tabs whose
+    contents changed. Failed polls back off exponentially (with jitter) up to
+    `max_backoff` seconds; the first successful poll resets the interval.
+    """
+    def __init__(self, dm, interval=30, max_backoff=600):
+        self.dm = dm
+        self.interval = interval
+        self.max_backoff = max_backoff
+        self.failures = 0
+        self.last_refreshed = []
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="sheets-refresh", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def poll_once(self):
+        """Runs one poll now. Returns the refreshed table names."""
+        try:
+            refreshed = self.dm.refresh_from_sheets()
+        except Exception as e:
+            self.failures += 1
+            print(f"Sheets refresh failed ({self.failures} in a row): {e}. Next try in {self.next_delay():.0f}s.")
+            return []
+        self.failures = 0
+        if refreshed:
+            self.last_refreshed = refreshed
+        return refreshed
+
+    def next_delay(self):
+        if not self.failures:
+            return self.interval
+        delay = min(self.interval * 2 ** self.failures, self.max_backoff)
+        return delay * random.uniform(0.8, 1.2)
+
+    def _run(self):
+        while not self._stop.wait(self.next_delay()):
+            self.poll_once()
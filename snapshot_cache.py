@@ -0,0 +1,92 @@
+"""
+Local binary snapshot of DataManager's already-normalised tables.
+
+Tables are stored column by column in a NumPy .npz (no pickle): every raw
+string column is dictionary encoded (integer codes + distinct values) and
+typed date columns are stored as datetime64 arrays. Set/tuple columns are
+rebuilt from the distinct raw values only, so loading a 100k row roster is
+mostly array indexing. A snapshot is only used when its fingerprint (file
+mtimes and sizes, or the Sheet's modifiedTime) matches the source.
+"""
+import json
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+import models
+
+FORMAT_VERSION = 1
+
+
+class SnapshotCache:
+    def __init__(self, directory=".aeroagent_cache", name="snapshot.npz"):
+        self.directory = directory
+        self.path = os.path.join(directory, name)
+
+    def load(self, fingerprint):
+        """Returns (tables, meta) if a snapshot for `fingerprint` exists, else None.
+        tables: {table: (raw_df, typed_df)}"""
+        if not os.path.exists(self.path):
+            return None
+        try:
+            with np.load(self.path, allow_pickle=False) as data:
+                meta = json.loads(str(data["meta"]))
+                if meta.get("format") != FORMAT_VERSION or meta.get("fingerprint") != fingerprint:
+                    return None
+                tables = {table: _decode_table(table, columns, data) for table, columns in meta["tables"].items()}
+            return tables, meta.get("extra", {})
+        except Exception as e:
+            print(f"Ignoring unreadable snapshot {self.path}: {e}")
+            return None
+
+    def save(self, fingerprint, tables, extra=None):
+        """tables: {table: (raw_df, typed_df)}. Skipped if a typed column can't be stored."""
+        arrays = {}
+        meta = {"format": FORMAT_VERSION, "fingerprint": fingerprint, "tables": {}, "extra": extra or {}}
+        for table, (raw, typed) in tables.items():
+            for col in models.DATE_COLUMNS[table]:
+                if col in typed.columns and not pd.api.types.is_datetime64_dtype(typed[col]):
+                    return False # e.g. mixed timezones, not worth a lossy encoding
+            meta["tables"][table] = raw.columns.tolist()
+            for col in raw.columns:
+                codes, uniques = pd.factorize(raw[col], use_na_sentinel=False)
+                arrays[f"{table}/{col}/codes"] = codes.astype(np.int32)
+                arrays[f"{table}/{col}/values"] = np.asarray([str(v) for v in uniques], dtype=str)
+                if col in models.DATE_COLUMNS[table]:
+                    arrays[f"{table}/{col}/dates"] = typed[col].to_numpy(dtype="datetime64[ns]")
+        arrays["meta"] = np.asarray(json.dumps(meta))
+
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix="snapshot.", suffix=".npz", dir=self.directory)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, **arrays)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return True
+
+
+def _decode_table(table, columns, data):
+    raw, typed = {}, {}
+    for col in columns:
+        codes = data[f"{table}/{col}/codes"]
+        uniques = data[f"{table}/{col}/values"].astype(object)
+        raw[col] = uniques[codes] if len(uniques) else np.empty(0, dtype=object)
+        if col in models.DATE_COLUMNS[table]:
+            typed[col] = data[f"{table}/{col}/dates"]
+        elif col in models.CATEGORY_COLUMNS[table]:
+            typed[col] = pd.Categorical.from_codes(codes, categories=pd.Index(uniques, dtype=object)) if len(uniques) \
+                else pd.Categorical([])
+        elif col in models.SET_COLUMNS[table] or col in models.TUPLE_COLUMNS[table]:
+            # Parse each distinct cell once, then fan out by code
+            parsed = np.empty(len(uniques), dtype=object)
+            for i, value in enumerate(uniques):
+                parsed[i] = models.parse_value(table, col, value)
+            typed[col] = parsed[codes] if len(uniques) else np.empty(0, dtype=object)
+        else:
+            typed[col] = raw[col]
+    # dicts keep column order; passing columns= as well sends pandas down a slow path
+    return pd.DataFrame(raw), pd.DataFrame(typed)
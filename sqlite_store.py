@@ -0,0 +1,184 @@
+import json
+import sqlite3
+import threading
+from contextlib import contextmanager
+import pandas as pd
+
+# Columns indexed in the database, where the table has them
+INDEXED_COLUMNS = {
+    "pilots": ["pilot_id", "status", "location", "current_assignment"],
+    "drones": ["drone_id", "status", "location", "current_assignment"],
+    "missions": ["project_id", "location", "priority"],
+}
+# The change log keeps this many recent entries for other processes to catch up from
+KEEP_CHANGES = 10000
+
+
+def _quote(name):
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+class SQLiteStore:
+    """
+    Pilots, drones and missions in one SQLite database (WAL mode).
+
+    One table per DataFrame, rows in DataFrame order (`row` is the position),
+    every cell TEXT. Updates go through the id index, so they cost O(log n)
+    instead of rewriting a CSV. Each update is also written to a `changes` log
+    in the same transaction, which is how other processes sharing the file
+    catch up without reloading whole tables:
+        seq | tbl    | key  | fields
+        42  | pilots | P001 | {"status": "On Leave"}
+    """
+    def __init__(self, path, timeout=30.0):
+        self.path = path
+        # Autocommit mode: transactions are opened explicitly by transaction()
+        self._conn = sqlite3.connect(path, timeout=timeout, isolation_level=None, check_same_thread=False)
+        self._lock = threading.RLock()
+        self._depth = 0
+        self.changed = False # rows written in the current transaction
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            # With WAL, NORMAL still survives application crashes; only power loss can drop the last commits
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS changes ("
+                "seq INTEGER PRIMARY KEY AUTOINCREMENT, tbl TEXT NOT NULL, key TEXT NOT NULL, fields TEXT NOT NULL)"
+            )
+
+    def tables(self):
+        with self._lock:
+            rows = self._conn.execute("SELECT name FROM sqlite_master WHERE type='table'").fetchall()
+        return {name for (name,) in rows}
+
+    def empty(self):
+        return not {"pilots", "drones", "missions"} <= self.tables()
+
+    @property
+    def in_transaction(self):
+        return self._depth > 0
+
+    @contextmanager
+    def transaction(self, immediate=True):
+        """
+        Reentrant transaction. The outermost level runs BEGIN IMMEDIATE (takes
+        the database write lock, waiting up to `timeout` for another writer)
+        and commits on exit, or rolls back if the block raises.
+        """
+        with self._lock:
+            outer = self._depth == 0
+            if outer:
+                self._conn.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+                self.changed = False
+            self._depth += 1
+        try:
+            yield self
+        except BaseException:
+            with self._lock:
+                self._depth -= 1
+                if outer:
+                    self._conn.execute("ROLLBACK")
+            raise
+        else:
+            with self._lock:
+                self._depth -= 1
+                if outer:
+                    self._conn.execute("COMMIT")
+
+    def import_tables(self, frames):
+        """Replaces the stored tables with `frames` ({table: DataFrame})."""
+        with self.transaction():
+            for table, df in frames.items():
+                columns = [str(col) for col in df.columns]
+                self._conn.execute(f"DROP TABLE IF EXISTS {_quote(table)}")
+                self._conn.execute(
+                    f"CREATE TABLE {_quote(table)} (row INTEGER PRIMARY KEY, "
+                    + ", ".join(f"{_quote(col)} TEXT" for col in columns) + ")"
+                )
+                for col in INDEXED_COLUMNS[table]:
+                    if col in columns:
+                        self._conn.execute(
+                            f"CREATE INDEX {_quote(f'idx_{table}_{col}')} ON {_quote(table)} ({_quote(col)})"
+                        )
+                placeholders = ", ".join("?" * (len(columns) + 1))
+                self._conn.executemany(
+                    f"INSERT INTO {_quote(table)} VALUES ({placeholders})",
+                    ((pos, *row) for pos, row in enumerate(df.astype(str).itertuples(index=False, name=None))),
+                )
+            # Tells processes already holding the old tables to reload them
+            self._conn.execute("INSERT INTO changes (tbl, key, fields) VALUES ('*', '', '{}')")
+
+    def load(self, table, required_cols):
+        """The table as a DataFrame of strings, in row order."""
+        with self._lock:
+            cursor = self._conn.execute(f"SELECT * FROM {_quote(table)} ORDER BY row")
+            columns = [d[0] for d in cursor.description][1:]
+            rows = [row[1:] for row in cursor.fetchall()]
+        df = pd.DataFrame(rows, columns=columns, dtype=str).fillna("")
+        for col in required_cols:
+            if col not in df.columns:
+                df[col] = ""
+        return df
+
+    def update(self, table, key_col, key, fields):
+        """Sets `fields` on every row whose `key_col` is `key` and logs the change. Returns its seq."""
+        assignments = ", ".join(f"{_quote(col)} = ?" for col in fields)
+        with self.transaction():
+            self._conn.execute(
+                f"UPDATE {_quote(table)} SET {assignments} WHERE {_quote(key_col)} = ?",
+                [str(value) for value in fields.values()] + [key],
+            )
+            cursor = self._conn.execute(
+                "INSERT INTO changes (tbl, key, fields) VALUES (?, ?, ?)",
+                (table, key, json.dumps(fields, separators=(",", ":"))),
+            )
+            seq = cursor.lastrowid
+            if seq % 1000 == 0:
+                self._conn.execute("DELETE FROM changes WHERE seq <= ?", (seq - KEEP_CHANGES,))
+            self.changed = True
+        return seq
+
+    def last_seq(self):
+        with self._lock:
+            row = self._conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'changes'").fetchone()
+        return row[0] if row else 0
+
+    def changes_since(self, seq):
+        """
+        ([(table, key, fields)], last seq) for changes after `seq`, or (None, last seq)
+        if the tables must be reloaded instead: some of the changes were already
+        pruned from the log, or the tables were re-imported.
+        """
+        with self._lock:
+            first = self._conn.execute("SELECT MIN(seq) FROM changes").fetchone()[0]
+            rows = self._conn.execute(
+                "SELECT seq, tbl, key, fields FROM changes WHERE seq > ? ORDER BY seq", (seq,)
+            ).fetchall()
+            last = self.last_seq()
+        if (first is None and last > seq) or (first is not None and first > seq + 1):
+            return None, last
+        if any(table == "*" for _, table, _, _ in rows):
+            return None, last
+        return [(table, key, json.loads(fields)) for _, table, key, fields in rows], last
+
+    def data_version(self):
+        """Changes whenever another connection commits to the database (PRAGMA data_version)."""
+        with self._lock:
+            return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+if __name__ == "__main__":
+    # python sqlite_store.py [db_file] - migrate the CSVs into a fresh database
+    import sys
+    from data_manager import DataManager
+
+    db_file = sys.argv[1] if len(sys.argv) > 1 else "aeroagent.db"
+    dm = DataManager(storage="csv", cache_dir=None)
+    store = SQLiteStore(db_file)
+    store.import_tables({table: getattr(dm, table) for table in ("pilots", "drones", "missions")})
+    print(f"Migrated {len(dm.pilots)} pilots, {len(dm.drones)} drones and {len(dm.missions)} missions into {db_file}")
+    store.close()
@@ -0,0 +1,91 @@
+"""
+Local stand-in for the OpenRouter chat completions API, for running the agent
+(sync or async, streaming or not) without a key or network:
+
+    uvicorn stub_llm_server:app --port 8001
+    LLM_BASE_URL=http://127.0.0.1:8001/v1 OPENROUTER_API_KEY=stub streamlit run ui.py
+
+NLU requests are answered with the intent router's best guess; response
+requests get a short conflict summary, streamed word by word when asked.
+STUB_LLM_DELAY adds a per-request delay (seconds) to mimic model latency.
+"""
+import asyncio
+import json
+import os
+import re
+import time
+import uuid
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+from intent_router import IntentRouter
+
+app = FastAPI(title="AeroAgent Stub LLM")
+router = IntentRouter()
+DELAY = float(os.getenv("STUB_LLM_DELAY", "0"))
+
+
+def _nlu_reply(text):
+    found = router.match(text)
+    if found is None:
+        return json.dumps({"tool": "general_chat", "reply": "I am a stub model. Try 'check conflicts for PRJ001'."})
+    return json.dumps(found.tool_call)
+
+
+def _nlg_reply(text):
+    match = re.search(r"Tool Result: (.*)", text, re.S)
+    try:
+        result = json.loads(match.group(1)) if match else {}
+    except ValueError:
+        result = {}
+    messages = re.findall(r'"severity":"(\w+)","message":"([^"]*)"', json.dumps(result, separators=(",", ":")))
+    if not messages:
+        return "No conflicts found."
+    lines = [f"- **{severity}**: {message}" for severity, message in messages]
+    return "\n".join(lines) + "\n\n**Recommendation:** Resolve the HARD conflicts first or pick another resource."
+
+
+def _completion(content, model):
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+    }
+
+
+async def _stream(content, model):
+    completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+
+    def chunk(delta, finish_reason=None):
+        body = {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+        }
+        return f"data: {json.dumps(body)}\n\n"
+
+    yield chunk({"role": "assistant", "content": ""})
+    for token in re.findall(r"\S+\s*", content):
+        await asyncio.sleep(DELAY / 20)
+        yield chunk({"content": token})
+    yield chunk({}, "stop")
+    yield "data: [DONE]\n\n"
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    messages = body.get("messages", [])
+    system = messages[0]["content"] if messages else ""
+    user = messages[-1]["content"] if messages else ""
+    model = body.get("model", "stub")
+
+    content = _nlu_reply(user) if "TOOLS:" in system else _nlg_reply(user)
+    if body.get("stream"):
+        return StreamingResponse(_stream(content, model), media_type="text/event-stream")
+    await asyncio.sleep(DELAY)
+    return _completion(content, model)
@@ -0,0 +1,74 @@
+import os
+import sys
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import data_manager
+from data_manager import DataManager
+from logic import Logic
+
+PILOTS = [
+    {"pilot_id": "P001", "name": "Arjun", "skills": "Mapping, Survey", "certifications": "DGCA, Night Ops",
+     "location": "Bangalore", "status": "Available", "current_assignment": "–", "available_from": "2026-01-01"},
+    {"pilot_id": "P002", "name": "Neha", "skills": "Inspection", "certifications": "DGCA",
+     "location": "Bangalore", "status": "Available", "current_assignment": "–", "available_from": "2026-01-01"},
+]
+DRONES = [
+    {"drone_id": "D001", "model": "DJI M300", "capabilities": "LiDAR, RGB", "status": "Available",
+     "location": "Bangalore", "current_assignment": "–", "maintenance_due": "2026-12-01"},
+    {"drone_id": "D002", "model": "DJI Mavic 3", "capabilities": "RGB", "status": "Available",
+     "location": "Bangalore", "current_assignment": "–", "maintenance_due": "2026-12-01"},
+]
+MISSIONS = [
+    {"project_id": "PRJ002", "client": "Client B", "location": "Bangalore", "required_skills": "Mapping",
+     "required_certs": "DGCA, Night Ops", "start_date": "2026-02-01", "end_date": "2026-02-05", "priority": "High"},
+]
+
+
+@pytest.fixture
+def logic(tmp_path, monkeypatch):
+    monkeypatch.setattr(data_manager, "SHEET_ID", None)
+    files = {}
+    for name, rows in (("pilots.csv", PILOTS), ("drones.csv", DRONES), ("missions.csv", MISSIONS)):
+        files[name] = str(tmp_path / name)
+        pd.DataFrame(rows).to_csv(files[name], index=False)
+    dm = DataManager(files["pilots.csv"], files["drones.csv"], files["missions.csv"], cache_dir=None)
+    return Logic(dm)
+
+
+def _scores(logic, project_id):
+    return {p["id"]: p["score"] for p in logic.find_matches(project_id)["pilots"]}
+
+
+def test_cert_edit_changes_match_score(logic):
+    before = _scores(logic, "PRJ002")
+    assert max(before, key=before.get) == "P001"
+
+    logic.dm.update_record("pilots", "P001", {"certifications": "DGCA"})
+
+    after = _scores(logic, "PRJ002")
+    assert after["P001"] < before["P001"]
+    candidate = next(p for p in logic.find_matches("PRJ002")["pilots"] if p["id"] == "P001")
+    assert candidate["issues"][0] == "Missing Certs: night ops"
+
+
+def test_new_cert_is_picked_up(logic):
+    before = _scores(logic, "PRJ002")
+    # "Night Ops" is new for P002, and "Thermal" is a new vocabulary item altogether
+    logic.dm.update_record("pilots", "P002", {"certifications": "DGCA, Night Ops, Thermal", "skills": "Mapping"})
+    assert _scores(logic, "PRJ002")["P002"] > before["P002"]
+
+
+def test_status_change_keeps_bitmaps(logic):
+    matrices = logic._pilot_matrices()
+    logic.dm.update_pilot_status("P002", "On Leave")
+    assert all(a is b for a, b in zip(matrices, logic._pilot_matrices()))
+
+
+def test_capability_edit_changes_drone_bitmap(logic):
+    matrix = logic._drone_capabilities()
+    assert matrix.missing_count(["lidar"]).tolist() == [0, 1]
+    logic.dm.update_record("drones", "D002", {"capabilities": "LiDAR"})
+    logic.dm.update_record("drones", "D001", {"capabilities": "RGB"})
+    assert logic._drone_capabilities().missing_count(["lidar"]).tolist() == [1, 0]
@@ -1,5 +1,6 @@
 import streamlit as st
 import time
+import asyncio
 from agent_llm import AgentLLM
 import pandas as pd
 
@@ -36,6 +37,19 @@ if "messages" not in st.session_state:
 # We pass direct_mode=True so it works on Streamlit Cloud without the separate API server
 if "agent" not in st.session_state:
     st.session_state.agent = AgentLLM(direct_mode=True)
+    # One event loop per session, so the agent's async clients keep their connections
+    st.session_state.loop = asyncio.new_event_loop()
+
+
+def stream_reply(prompt):
+    """Drives the agent's async generator from Streamlit's (synchronous) script thread."""
+    loop = st.session_state.loop
+    chunks = st.session_state.agent.aprocess_message(prompt)
+    try:
+        while True:
+            yield loop.run_until_complete(chunks.__anext__())
+    except StopAsyncIteration:
+        pass
 
 # --- Chat Interface ---
 st.title("AeroAgent Coordinator")
@@ -54,10 +68,9 @@ if prompt := st.chat_input("Ask anything..."):
 
     # Generate Response
     with st.chat_message("assistant"):
-        with st.spinner("Analyzing operational data..."):
-            try:
-                response = st.session_state.agent.process_message(prompt)
-                st.markdown(response)
-                st.session_state.messages.append({"role": "assistant", "content": response})
-            except Exception as e:
-                st.error(f"Agent Error: {e}")
+        try:
+            # Renders each chunk as it arrives instead of waiting for the whole reply
+            response = st.write_stream(stream_reply(prompt))
+            st.session_state.messages.append({"role": "assistant", "content": response})
+        except Exception as e:
+            st.error(f"Agent Error: {e}")